@@ -56,7 +56,8 @@ export default function CheckoutScreen() {
 
     // Use Loyalty Points (1 point = ₹1)
     const maxPointsAvailable = user?.loyaltyPoints || 0;
-    const pointsToUse = usePoints ? Math.min(maxPointsAvailable, initialTotal) : 0;
+    // The server checks points against the item total it prices, so they can't exceed it
+    const pointsToUse = usePoints ? Math.min(maxPointsAvailable, initialTotal, total) : 0;
     const grandTotal = initialTotal - pointsToUse;
 
     useEffect(() => {
@@ -98,7 +99,8 @@ export default function CheckoutScreen() {
                     quantity: item.quantity,
                     price: item.price
                 })),
-                total: initialTotal, // Original total before points
+                // Item total (before offer, taxes and points): the server prices the items and checks it
+                total,
                 pointsUsed: pointsToUse,
                 paymentMethod: 'UPI',
                 pickupTime: pickupTime // Added missing field
@@ -1,9 +1,15 @@
 
 import { IconSymbol } from '@/components/ui/icon-symbol';
 import { BorderRadius, Colors, Spacing } from '@/constants/theme';
-import React from 'react';
+import { apiService } from '@/services/api';
+import React, { useEffect, useState } from 'react';
 import { FlatList, Modal, StyleSheet, Text, TouchableOpacity, TouchableWithoutFeedback, View } from 'react-native';
 
+interface Slot {
+    label: string;
+    full: boolean;
+}
+
 interface TimePickerModalProps {
     visible: boolean;
     onClose: () => void;
@@ -11,9 +17,9 @@ interface TimePickerModalProps {
 }
 
 export function TimePickerModal({ visible, onClose, onSelectTime }: TimePickerModalProps) {
-    // Generate time slots (e.g., next few hours in 15 min intervals)
-    const generateTimeSlots = () => {
-        const slots = [];
+    // Next few hours in 15 min intervals; used when the server can't be reached
+    const generateTimeSlots = (): Slot[] => {
+        const slots: Slot[] = [];
         const start = new Date();
         start.setMinutes(Math.ceil(start.getMinutes() / 15) * 15);
         start.setSeconds(0);
@@ -21,12 +27,20 @@ export function TimePickerModal({ visible, onClose, onSelectTime }: TimePickerMo
 
         for (let i = 0; i < 12; i++) { // Next 3 hours
             const time = new Date(start.getTime() + i * 15 * 60000);
-            slots.push(time.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
+            slots.push({ label: time.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }), full: false });
         }
         return slots;
     };
 
-    const slots = generateTimeSlots();
+    const [slots, setSlots] = useState<Slot[]>(generateTimeSlots);
+
+    // Remaining kitchen capacity per slot, so students spread out instead of all picking 12:30
+    useEffect(() => {
+        if (!visible) return;
+        apiService.getPickupSlots()
+            .then((data) => setSlots(data.slots.map((slot: any) => ({ label: slot.label, full: slot.remaining <= 0 }))))
+            .catch(() => setSlots(generateTimeSlots()));
+    }, [visible]);
 
     return (
         <Modal
@@ -47,16 +61,19 @@ export function TimePickerModal({ visible, onClose, onSelectTime }: TimePickerMo
                             </View>
                             <FlatList
                                 data={slots}
-                                keyExtractor={(item) => item}
+                                keyExtractor={(item) => item.label}
                                 renderItem={({ item }) => (
                                     <TouchableOpacity
                                         style={styles.timeSlot}
+                                        disabled={item.full}
                                         onPress={() => {
-                                            onSelectTime(item);
+                                            onSelectTime(item.label);
                                             onClose();
                                         }}
                                     >
-                                        <Text style={styles.timeText}>{item}</Text>
+                                        <Text style={[styles.timeText, item.full && styles.fullText]}>
+                                            {item.full ? `${item.label} (Full)` : item.label}
+                                        </Text>
                                     </TouchableOpacity>
                                 )}
                                 contentContainerStyle={styles.listContent}
@@ -109,4 +126,7 @@ const styles = StyleSheet.create({
         color: Colors.light.text,
         textAlign: 'center',
     },
+    fullText: {
+        color: Colors.light.textSecondary,
+    },
 });
@@ -18,6 +18,7 @@ export const API_ENDPOINTS = {
     CREATE_ORDER: '/api/orders',
     GET_USER_ORDERS: (userId: number) => `/api/orders/user/${userId}`,
     UPDATE_ORDER_STATUS: (orderId: string) => `/api/orders/${orderId}/status`,
+    GET_PICKUP_SLOTS: (date?: string) => `/api/orders/slots${date ? `?date=${date}` : ''}`,
 
     // Loyalty
     GET_LOYALTY_BALANCE: (userId: number) => `/api/loyalty/${userId}`,
@@ -3,7 +3,7 @@ import { UserProfile } from '../constants/types';
 import { Storage, KEYS } from '../services/storage';
 import { apiService } from '../services/api';
 import { useRouter, useSegments } from 'expo-router';
-import React, { createContext, useContext, useEffect, useState } from 'react';
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
 
 type AuthType = {
     user: any | null;
@@ -54,6 +54,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const [user, setUser] = useState<any>(undefined);
     const [isLoading, setIsLoading] = useState(false);
     const [orders, setOrders] = useState<any[]>([]);
+    const pendingOrder = useRef<{ payload: string; key: string } | null>(null);
 
     useEffect(() => {
         const loadSession = async () => {
@@ -136,16 +137,29 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const placeOrder = async (orderDetails: any) => {
         if (!user) return;
 
+        const orderData = {
+            userId: user.id,
+            items: orderDetails.items,
+            total: orderDetails.total,
+            pickupTime: orderDetails.pickupTime,
+            paymentMethod: orderDetails.paymentMethod,
+            pointsUsed: orderDetails.pointsUsed || 0,
+        };
+
+        // Tapping "Place order" again after a timeout resends the same key,
+        // so an order that did reach the server is not placed twice
+        const payload = JSON.stringify(orderData);
+        if (!pendingOrder.current || pendingOrder.current.payload !== payload) {
+            pendingOrder.current = {
+                payload,
+                key: `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`,
+            };
+        }
+
         try {
             // Create order via API
-            const response = await apiService.createOrder({
-                userId: user.id,
-                items: orderDetails.items,
-                total: orderDetails.total,
-                pickupTime: orderDetails.pickupTime,
-                paymentMethod: orderDetails.paymentMethod,
-                pointsUsed: orderDetails.pointsUsed || 0,
-            });
+            const response = await apiService.createOrder(orderData, pendingOrder.current.key);
+            pendingOrder.current = null;
 
             if (response.success) {
                 // Update local orders
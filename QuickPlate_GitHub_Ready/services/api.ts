@@ -87,13 +87,19 @@ class APIService {
     }
 
     // Orders
-    async createOrder(orderData: any) {
+    // Retries must reuse the same idempotencyKey so the server places the order only once
+    async createOrder(orderData: any, idempotencyKey?: string) {
         return this.request(API_ENDPOINTS.CREATE_ORDER, {
             method: 'POST',
             body: JSON.stringify(orderData),
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined,
         });
     }
 
+    async getPickupSlots(date?: string) {
+        return this.request(API_ENDPOINTS.GET_PICKUP_SLOTS(date));
+    }
+
     async getUserOrders(userId: number) {
         return this.request(API_ENDPOINTS.GET_USER_ORDERS(userId));
     }
@@ -10,7 +10,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useRouter } from 'expo-router';
 
 export default function ExploreScreen() {
-  const { orders } = useAuth();
+  const { orders, hasMoreOrders, loadMoreOrders } = useAuth();
   const { reorder } = useCart();
   const router = useRouter();
   const [activeTab, setActiveTab] = useState<'Live' | 'Past'>('Live');
@@ -72,6 +72,13 @@ export default function ExploreScreen() {
         data={displayedOrders}
         keyExtractor={item => item.id}
         contentContainerStyle={styles.listContent}
+        onEndReached={() => { loadMoreOrders(); }}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={hasMoreOrders ? (
+          <TouchableOpacity style={styles.loadMore} onPress={loadMoreOrders}>
+            <Text style={styles.loadMoreText}>Load older orders</Text>
+          </TouchableOpacity>
+        ) : null}
         ListEmptyComponent={
           <View style={styles.emptyState}>
             <Text style={styles.emptyText}>No {activeTab.toLowerCase()} orders found.</Text>
@@ -235,4 +242,13 @@ const styles = StyleSheet.create({
     fontWeight: '600',
     color: Colors.light.primary,
   },
+  loadMore: {
+    paddingVertical: Spacing.md,
+    alignItems: 'center',
+  },
+  loadMoreText: {
+    fontSize: 14,
+    fontWeight: '600',
+    color: Colors.light.primary,
+  },
 });
@@ -2,31 +2,71 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
 from models import db
+from migrations import run_migrations
+import logging
 import os
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # Disable strict slashes to avoid 308 redirects
     app.url_map.strict_slashes = False
     
+    # No-op when gunicorn (or anything else) already configured logging
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
     # Initialize extensions
+    from services import sqlite_profile
+    sqlite_profile.configure_pool(app)
     db.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
+    sqlite_profile.init_app(app)
+    
+    from services.metrics import metrics
+    metrics.init_app(app)
+    
+    from services.menu_cache import menu_cache
+    menu_cache.init_app(app)
+    
+    from services.price_index import price_index
+    price_index.init_app(app)
+    
+    from services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+    
+    from services import session_tokens
+    session_tokens.init_app(app)
+    
+    from services.kitchen import kitchen
+    kitchen.init_app(app)
+    
+    from services.pickup_slots import pickup_slots
+    pickup_slots.init_app(app)
+    
+    from services.order_events import order_events
+    order_events.init_app(app)
+    
+    from services.recommender import recommender
+    recommender.init_app(app)
+    
     # Register blueprints
     from routes.auth import auth_bp
     from routes.meals import meals_bp
     from routes.orders import orders_bp
     from routes.loyalty import loyalty_bp
     from routes.ai import ai_bp
+    from routes.kitchen import kitchen_bp
+    from routes.admin import admin_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(meals_bp, url_prefix='/api/meals')
     app.register_blueprint(orders_bp, url_prefix='/api/orders')
     app.register_blueprint(loyalty_bp, url_prefix='/api/loyalty')
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
+    app.register_blueprint(kitchen_bp, url_prefix='/api/kitchen')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
     
     # Health check endpoint
     @app.route('/health')
@@ -36,11 +76,14 @@ def create_app():
     # Create database tables
     with app.app_context():
         db.create_all()
+        run_migrations()
         print("✅ Database tables created successfully")
     
     return app
 
 if __name__ == '__main__':
+    # The development server runs with debug=True; say so before create_app() checks SECRET_KEY
+    os.environ.setdefault('FLASK_DEBUG', '1')
     app = create_app()
     port = int(os.environ.get('PORT', 5000))
     print(f"🚀 QuickPlate Backend running on http://localhost:{port}")
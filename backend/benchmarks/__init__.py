@@ -0,0 +1,5 @@
+import os
+
+# Benchmarks build apps (and spawn gunicorn) without debug mode, which
+# refuses the default SECRET_KEY; give them a throwaway one.
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
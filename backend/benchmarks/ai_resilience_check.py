@@ -0,0 +1,65 @@
+"""
+Exercise AIService's deadlines, concurrency cap and circuit breaker
+against a local fake model, with no network or API key.
+Run from the backend directory: python -m benchmarks.ai_resilience_check
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from services.ai_service import AIService
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; latency and failures are switchable"""
+
+    def __init__(self):
+        self.latency = 0.01
+        self.fail = False
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError('fake Gemini outage')
+        return FakeResponse('Fake answer')
+
+def main():
+    Config.AI_TIMEOUT_SECONDS = 0.2
+    Config.AI_MAX_CONCURRENCY = 4
+    Config.AI_BREAKER_FAILURES = 3
+    Config.AI_BREAKER_COOLDOWN = 1
+    model = FakeModel()
+    service = AIService(model=model)
+
+    def ask():
+        started = time.perf_counter()
+        message = service.chat('is the thali veg')['message']
+        return message == 'Fake answer', time.perf_counter() - started
+
+    print('healthy:      ', ask())
+
+    model.latency = 1.0
+    print('slow model:   ', [ask() for _ in range(3)], 'breaker', service.breaker.state)
+
+    print('breaker open: ', ask(), '(fallback without calling the model)')
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        model.latency, model.fail = 0.1, False
+        service.breaker.record_success()
+        time.sleep(1.1)  # let the timed-out calls finish and free their slots
+        results = list(pool.map(lambda _: ask()[0], range(12)))
+    print('burst of 12:  ', f'{sum(results)} answered by the model, {12 - sum(results)} fell back (cap 4)')
+
+    model.latency = 0.01
+    time.sleep(Config.AI_BREAKER_COOLDOWN + 0.1)
+    print('recovered:    ', ask(), 'breaker', service.breaker.state)
+
+    print(json.dumps(service.stats(), indent=2))
+
+if __name__ == '__main__':
+    main()
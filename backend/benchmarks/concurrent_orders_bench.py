@@ -0,0 +1,121 @@
+"""
+Concurrent order placement against one SQLite file, with and without the
+SQLite production profile (Config.SQLITE_PRAGMAS). Each writer and reader is
+a separate process, like a gunicorn worker; readers poll order history the
+way the app does at peak.
+Run from the backend directory: python -m benchmarks.concurrent_orders_bench
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from config import Config
+
+def make_config(db_path, tuned):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        # "before" is SQLite's defaults: rollback journal, no busy timeout
+        SQLITE_PRAGMAS = Config.SQLITE_PRAGMAS if tuned else {}
+        # Measure write throughput, not slot rejections: open all day with room for every order
+        PICKUP_OPEN, PICKUP_CLOSE = '00:00', '23:59'
+        PICKUP_SLOT_CAPACITY = 10 ** 6
+
+    return BenchConfig
+
+def seed(db_path, tuned, users):
+    from app import create_app
+    from models import db, User, Meal
+
+    app = create_app(make_config(db_path, tuned))
+    with app.app_context():
+        db.session.add_all([User(sap_id=f'bench-{i}', name=f'Bench {i}', loyalty_points=0) for i in range(users)])
+        db.session.add(Meal(name='Masala Dosa', category='Breakfast', price=60, available=True, prep_time=15))
+        db.session.commit()
+
+def writer(db_path, tuned, users, orders, start_event, results):
+    from app import create_app
+    from services.session_tokens import issue_token
+
+    app = create_app(make_config(db_path, tuned))
+    client = app.test_client()
+    with app.app_context():
+        tokens = [issue_token(user_id) for user_id in range(1, users + 1)]
+    ok = failed = 0
+    start_event.wait()
+    for i in range(orders):
+        token = tokens[(os.getpid() + i) % users]
+        response = client.post('/api/orders', headers={'Authorization': f'Bearer {token}'}, json={
+            'items': [{'mealId': '1', 'name': 'Masala Dosa', 'quantity': 1, 'price': 60}],
+            'total': 60
+        })
+        if response.status_code == 201:
+            ok += 1
+        else:
+            failed += 1
+    results.put((ok, failed))
+
+def reader(db_path, tuned, users, start_event, stop_event):
+    from app import create_app
+    from services.session_tokens import issue_token
+
+    app = create_app(make_config(db_path, tuned))
+    client = app.test_client()
+    with app.app_context():
+        tokens = [issue_token(user_id) for user_id in range(1, users + 1)]
+    start_event.wait()
+    i = 0
+    while not stop_event.is_set():
+        user_id = 1 + i % users
+        client.get(f'/api/orders/user/{user_id}', headers={'Authorization': f'Bearer {tokens[user_id - 1]}'})
+        i += 1
+
+def run(tuned, writers, readers, orders, users):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        seed(db_path, tuned, users)
+
+        start_event = multiprocessing.Event()
+        stop_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=writer, args=(db_path, tuned, users, orders, start_event, results))
+            for _ in range(writers)
+        ]
+        background = [
+            multiprocessing.Process(target=reader, args=(db_path, tuned, users, start_event, stop_event))
+            for _ in range(readers)
+        ]
+        for process in processes + background:
+            process.start()
+        time.sleep(2)  # let every worker finish create_app()
+
+        started = time.perf_counter()
+        start_event.set()
+        totals = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        stop_event.set()
+        for process in processes + background:
+            process.join()
+
+        ok = sum(t[0] for t in totals)
+        failed = sum(t[1] for t in totals)
+        return ok / elapsed, ok, failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--orders', type=int, default=200, help='orders per writer')
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    for tuned in (False, True):
+        rate, ok, failed = run(tuned, args.writers, args.readers, args.orders, args.users)
+        label = 'tuned  ' if tuned else 'default'
+        print(f"{label}: {rate:8.0f} orders/s  ok={ok} failed={failed}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Concurrency check for Idempotency-Key on POST /api/orders.
+Each round fires the same order with the same key from many threads at
+once (released together by a barrier), then checks that exactly one
+order and one set of ledger entries were written and that every thread
+got the same 201 response. Exits non-zero on any violation.
+Run from the backend directory:
+    python -m benchmarks.idempotency_stress --threads 32 --rounds 50
+    python -m benchmarks.idempotency_stress --target gunicorn --workers 4
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, func
+from models import db, User, Meal, Order, LoyaltyTransaction
+from services.session_tokens import issue_token
+from seed_db import seed_menu
+from benchmarks.menu_cache_bench import make_app
+from benchmarks.lunch_rush import ClientTransport, HttpTransport, start_gunicorn
+
+def fire(transport, threads, body, headers):
+    """Send the same request from every thread at once; returns [(status, json)]"""
+    barrier = threading.Barrier(threads)
+
+    def send(_):
+        barrier.wait()
+        status, data, _ = transport.request('POST', '/api/orders', body, headers)
+        return status, data
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(send, range(threads)))
+
+def check_round(app, user_id, responses, orders_before, ledger_before):
+    """Problems found in one round, as strings"""
+    problems = []
+    statuses = sorted({status for status, _ in responses}, key=str)
+    if statuses != [201]:
+        problems.append(f'statuses {statuses}')
+    order_ids = {data['order']['id'] for status, data in responses if status == 201}
+    if len(order_ids) > 1:
+        problems.append(f'{len(order_ids)} different orders returned')
+
+    with app.app_context():
+        orders = db.session.scalar(select(func.count()).select_from(Order).where(Order.user_id == user_id))
+        ledger = db.session.scalar(
+            select(func.count()).select_from(LoyaltyTransaction).where(LoyaltyTransaction.user_id == user_id)
+        )
+        db.session.remove()
+    if orders - orders_before != 1:
+        problems.append(f'{orders - orders_before} orders written')
+    # One 'order_earn' entry per order (no points are spent here)
+    if ledger - ledger_before != 1:
+        problems.append(f'{ledger - ledger_before} ledger entries written')
+    return problems, orders, ledger
+
+def run(app, transport, threads, rounds):
+    with app.app_context():
+        user = User(sap_id='stress-1', name='Stress Test', loyalty_points=0)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        token = issue_token(user_id)
+        meal = db.session.execute(select(Meal.id, Meal.price).where(Meal.available == True).limit(1)).one()
+        db.session.remove()
+
+    body = {'items': [{'mealId': str(meal.id), 'quantity': 1, 'price': meal.price}], 'total': meal.price,
+            'paymentMethod': 'UPI'}
+    orders, ledger = 0, 0
+    failures = 0
+    started = time.perf_counter()
+    for round_number in range(rounds):
+        headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': f'stress-{round_number}'}
+        # A different pickup slot each round, so slot capacity never gets in the way
+        pickup_time = f'{8 + round_number // 4 % 13:02d}:{round_number % 4 * 15:02d}'
+        responses = fire(transport, threads, dict(body, pickupTime=pickup_time), headers)
+        problems, orders, ledger = check_round(app, user_id, responses, orders, ledger)
+        if problems:
+            failures += 1
+            print(f"❌ Round {round_number}: {'; '.join(problems)}")
+    elapsed = time.perf_counter() - started
+
+    print(f"   {rounds} rounds x {threads} threads in {elapsed:.1f}s, {orders} orders written")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent requests per key')
+    parser.add_argument('--rounds', type=int, default=20, help='distinct keys to try')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'stress.db')
+        with contextlib.redirect_stdout(sys.stderr):
+            app = make_app(database)
+            with app.app_context():
+                seed_menu()
+                db.session.commit()
+
+        if args.target == 'client':
+            failures = run(app, ClientTransport(app), args.threads, args.rounds)
+        else:
+            process, port = start_gunicorn(database, args.workers)
+            try:
+                failures = run(app, HttpTransport(port), args.threads, args.rounds)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    if failures:
+        print(f"❌ {failures}/{args.rounds} round(s) wrote or returned more than one order")
+        return 1
+    print("✅ Every round collapsed into a single order")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Stress the loyalty ledger with hundreds of concurrent redemptions and
+order credits for one user, then check that nothing was lost or
+double-spent: the cached balance must equal both the expected arithmetic
+and the ledger sum.
+Run from the backend directory: python -m benchmarks.loyalty_stress
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from config import Config
+from models import db, User, Meal, Offer, LoyaltyTransaction
+from services.loyalty_ledger import reconcile
+from services.session_tokens import issue_token
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--redemptions', type=int, default=400)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--balance', type=int, default=500)
+    parser.add_argument('--cost', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class StressConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'stress.db')
+            SQLALCHEMY_ENGINE_OPTIONS = {**Config.SQLALCHEMY_ENGINE_OPTIONS, 'pool_size': args.threads, 'pool_timeout': 60}
+            SQLITE_PRAGMAS = {**Config.SQLITE_PRAGMAS, 'busy_timeout': 60000}
+            # Orders are booked ASAP: keep the canteen open with room for all of them
+            PICKUP_OPEN, PICKUP_CLOSE = '00:00', '23:59'
+            PICKUP_SLOT_CAPACITY = 10 ** 6
+
+        app = create_app(StressConfig)
+        with app.app_context():
+            user = User(sap_id='stress', name='Stress Test', loyalty_points=args.balance)
+            offer = Offer(title='Stress Offer', points_required=args.cost, discount_amount=args.cost, active=True)
+            # 100 rupees earns 5 points
+            meal = Meal(name='Stress Meal', category='Lunch', price=100, available=True, prep_time=1)
+            db.session.add_all([user, offer, meal])
+            db.session.flush()
+            db.session.add(LoyaltyTransaction(user_id=user.id, delta=args.balance, reason='opening_balance'))
+            db.session.commit()
+            user_id, offer_id, meal_id = user.id, offer.id, meal.id
+            headers = {'Authorization': f'Bearer {issue_token(user_id)}'}
+
+        def redeem(_):
+            response = app.test_client().post('/api/loyalty/redeem', headers=headers, json={'offerId': offer_id})
+            return 'redeem', response.status_code
+
+        def order(_):
+            response = app.test_client().post('/api/orders', headers=headers, json={
+                'items': [{'mealId': str(meal_id), 'name': 'Stress Meal', 'quantity': 1, 'price': 100}],
+                'total': 100
+            })
+            return 'order', response.status_code
+
+        jobs = [redeem] * args.redemptions + [order] * args.orders
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(lambda job: job(None), jobs))
+
+        redeemed = sum(1 for kind, status in results if kind == 'redeem' and status == 200)
+        rejected = sum(1 for kind, status in results if kind == 'redeem' and status == 400)
+        ordered = sum(1 for kind, status in results if kind == 'order' and status == 201)
+        errors = len(results) - redeemed - rejected - ordered
+
+        with app.app_context():
+            final = db.session.get(User, user_id).loyalty_points
+            mismatches = reconcile()
+
+        expected = args.balance - redeemed * args.cost + ordered * 5
+        print(f"redeemed={redeemed} rejected={rejected} orders={ordered} errors={errors}")
+        print(f"final balance={final} expected={expected} ledger mismatches={len(mismatches)}")
+
+        ok = final == expected and final >= 0 and not mismatches and errors == 0
+        print("✅ no lost updates or double spends" if ok else "❌ ledger inconsistency")
+        return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
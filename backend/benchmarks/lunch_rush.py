@@ -0,0 +1,283 @@
+"""
+Lunch-rush load test. Seeds a synthetic campus (seed_db.py), then
+runs concurrent student sessions against the Flask test client and/or a
+local gunicorn:
+
+    browse the menu -> open the lunch tab -> pick a pickup slot -> place
+    an order -> poll its status a few times -> sometimes redeem points
+
+while the counter moves some orders to Preparing. Prints p50/p95/p99
+latency, error count and throughput per endpoint as JSON, so runs can be
+saved and compared.
+Run from the backend directory:
+    python -m benchmarks.lunch_rush --users 20000 --orders 1000000 --sessions 2000 --out rush.json
+    python -m benchmarks.lunch_rush --database /tmp/campus.db --target gunicorn --workers 4
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select
+from models import db, User, Meal
+from services.session_tokens import issue_token
+from seed_db import seed_database
+from benchmarks.menu_cache_bench import make_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The counter's status updates are staff only
+ADMIN_KEY = 'lunch-rush-admin'
+
+class ClientTransport:
+    """In-process requests through the Flask test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers or {})
+        return response.status_code, response.get_json(silent=True), response.headers
+
+class HttpTransport:
+    """Keep-alive HTTP/1.1, one connection per driver thread"""
+
+    def __init__(self, port):
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in (0, 1):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                connection.request(method, path, payload, headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Worker closed the keep-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        try:
+            parsed = json.loads(data) if data else None
+        except ValueError:
+            parsed = None
+        return response.status, parsed, response.headers
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}  # endpoint -> [seconds, ...]
+        self.errors = {}   # endpoint -> count
+
+    def call(self, transport, endpoint, method, path, body=None, headers=None, ok=(200, 201, 304)):
+        started = time.perf_counter()
+        try:
+            status, data, response_headers = transport.request(method, path, body, headers)
+        except Exception:
+            status, data, response_headers = None, None, {}
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(elapsed)
+            if status not in ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return status, data, response_headers
+
+def student_session(transport, recorder, user_id, token, meals, rng):
+    auth = {'Authorization': f'Bearer {token}'}
+    staff = {'X-Admin-Key': ADMIN_KEY}
+
+    # The app keeps the menu ETag, so repeat visits mostly get 304s
+    status, _, headers = recorder.call(transport, 'GET /api/meals', 'GET', '/api/meals')
+    etag = headers.get('ETag') if status == 200 else None
+    recorder.call(transport, 'GET /api/meals', 'GET', '/api/meals', headers={'If-None-Match': etag} if etag else None)
+    recorder.call(transport, 'GET /api/meals?category', 'GET', '/api/meals?category=Lunch')
+
+    picks = rng.sample(meals, rng.choice((1, 2, 2, 3)))
+    items = [{'mealId': str(meal.id), 'name': meal.name, 'quantity': 1, 'price': meal.price} for meal in picks]
+    order = {'items': items, 'total': sum(meal.price for meal in picks), 'paymentMethod': 'UPI'}
+
+    # Everyone wants 12:xx; the time picker steers them to the nearest slot with room
+    wanted = 12 * 60 + rng.randrange(0, 60, 5)
+    status, data, _ = recorder.call(transport, 'GET /api/orders/slots', 'GET', '/api/orders/slots')
+    open_slots = [slot for slot in (data or {}).get('slots', []) if slot['remaining'] > 0]
+    if open_slots:
+        slot = min(open_slots, key=lambda slot: abs(int(slot['time'][:2]) * 60 + int(slot['time'][3:]) - wanted))
+        pickup_time = slot['label']
+    else:
+        pickup_time = f'12:{wanted % 60:02d} PM'
+    # A slot filled up since the picker loaded: take one of the alternatives offered.
+    # Once the kitchen is booked out for the day a 409 is the right answer, not an error.
+    status, data, _ = recorder.call(transport, 'POST /api/orders', 'POST', '/api/orders',
+                                    body=dict(order, pickupTime=pickup_time), headers=auth, ok=(201, 409))
+    if status == 409 and (data or {}).get('alternatives'):
+        status, data, _ = recorder.call(transport, 'POST /api/orders (retry)', 'POST', '/api/orders',
+                                        body=dict(order, pickupTime=data['alternatives'][0]['label']), headers=auth,
+                                        ok=(201, 409))
+    order_id = int(data['order']['id'].split('-')[1]) if status == 201 else None
+
+    if order_id:
+        for _ in range(rng.randint(1, 3)):
+            recorder.call(transport, 'GET /api/kitchen/orders/<id>', 'GET', f'/api/kitchen/orders/{order_id}', headers=auth)
+        recorder.call(transport, 'GET /api/orders/user/<id>', 'GET', f'/api/orders/user/{user_id}?limit=5', headers=auth)
+        if rng.random() < 0.5:
+            recorder.call(transport, 'PUT /api/orders/<id>/status', 'PUT', f'/api/orders/{order_id}/status',
+                          body={'status': 'Preparing'}, headers=staff)
+
+    if rng.random() < 0.2:
+        recorder.call(transport, 'GET /api/loyalty/<id>', 'GET', f'/api/loyalty/{user_id}', headers=auth)
+        recorder.call(transport, 'GET /api/loyalty/offers', 'GET', '/api/loyalty/offers')
+        # Running out of points is a normal answer, not an error
+        recorder.call(transport, 'POST /api/loyalty/redeem', 'POST', '/api/loyalty/redeem',
+                      body={'offerId': rng.randint(1, 2)}, headers=auth, ok=(200, 400))
+
+def drive(transport, users, meals, sessions, concurrency, seed):
+    recorder = Recorder()
+    rngs = [random.Random(seed + i) for i in range(sessions)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(student_session, transport, recorder, *users[rng.randrange(len(users))], meals, rng)
+            for rng in rngs
+        ]
+        for future in futures:
+            future.result()
+    return recorder, time.perf_counter() - started
+
+def summarize(recorder, wall):
+    def percentile(samples, p):
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        endpoints[endpoint] = {
+            'count': len(samples),
+            'errors': recorder.errors.get(endpoint, 0),
+            'p50Ms': percentile(samples, 0.50),
+            'p95Ms': percentile(samples, 0.95),
+            'p99Ms': percentile(samples, 0.99),
+            'rps': round(len(samples) / wall, 1)
+        }
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        'wallSeconds': round(wall, 2),
+        'requests': total,
+        'errors': sum(recorder.errors.values()),
+        'rps': round(total / wall, 1),
+        'endpoints': endpoints
+    }
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(database_path, workers):
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}', LOG_LEVEL='WARNING', ADMIN_API_KEY=ADMIN_KEY)
+    # stderr to a file, not a pipe nobody reads while the run goes on; shown if it fails to start
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-k', 'gevent', '--worker-connections', '1000',
+         '-w', str(workers), '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:create_app()'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}:\n{_tail(log)}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    process.wait(timeout=30)
+    raise RuntimeError(f'gunicorn did not come up within 60s:\n{_tail(log)}')
+
+def _tail(log, size=4000):
+    """The end of gunicorn's stderr"""
+    log.seek(0, os.SEEK_END)
+    log.seek(max(0, log.tell() - size))
+    return log.read().decode('utf-8', 'replace').strip() or '(no output)'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='seeded SQLite file to reuse (seeded here if missing)')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--target', choices=['client', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--sessions', type=int, default=1000, help='student sessions per target')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='write the JSON report here as well as to stdout')
+    args = parser.parse_args()
+
+    # Startup and progress chatter goes to stderr; stdout is only the JSON report
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(sys.stderr):
+        database = args.database or os.path.join(tmp, 'campus.db')
+        fresh = not os.path.exists(database)
+        app = make_app(database)
+        app.config['ADMIN_API_KEY'] = ADMIN_KEY
+        with app.app_context():
+            if fresh:
+                print(f"🏫 Seeding {args.users} users and {args.orders} orders into {database}")
+                seed_database(args.users, args.orders, seed=args.seed)
+            user_ids = db.session.scalars(select(User.id).order_by(User.id).limit(args.users)).all()
+            users = [(user_id, issue_token(user_id)) for user_id in user_ids]
+            meals = db.session.execute(select(Meal.id, Meal.name, Meal.price).where(Meal.available == True)).all()
+
+        report = {
+            'startedAt': datetime.utcnow().isoformat(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('out', 'database')},
+            'results': {}
+        }
+        if args.target in ('client', 'both'):
+            print("🧪 Test client...")
+            recorder, wall = drive(ClientTransport(app), users, meals, args.sessions, args.concurrency, args.seed)
+            report['results']['client'] = summarize(recorder, wall)
+        if args.target in ('gunicorn', 'both'):
+            print(f"🦄 gunicorn, {args.workers} gevent workers...")
+            process, port = start_gunicorn(database, args.workers)
+            try:
+                recorder, wall = drive(HttpTransport(port), users, meals, args.sessions, args.concurrency, args.seed + 1)
+                report['results']['gunicorn'] = summarize(recorder, wall)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
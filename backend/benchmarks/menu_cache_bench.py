@@ -0,0 +1,71 @@
+"""
+Compare GET /api/meals throughput with the menu cache on and off.
+Run from the backend directory: python -m benchmarks.menu_cache_bench
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from app import create_app
+from config import Config
+from models import db, Meal
+from services.menu_cache import menu_cache
+
+CATEGORIES = ['Breakfast', 'Lunch', 'Dinner', 'Snacks']
+
+def make_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+
+    return create_app(BenchConfig)
+
+def seed(app, meal_count):
+    with app.app_context():
+        db.session.add_all([
+            Meal(
+                name=f'Meal {i}',
+                category=CATEGORIES[i % len(CATEGORIES)],
+                price=20 + i % 80,
+                description='Benchmark meal with a reasonably long description to serialize.',
+                available=True,
+                prep_time=5 + i % 20
+            )
+            for i in range(meal_count)
+        ])
+        db.session.commit()
+
+def run(client, requests):
+    urls = ['/api/meals'] + [f'/api/meals?category={c}' for c in CATEGORIES]
+    start = time.perf_counter()
+    for i in range(requests):
+        response = client.get(urls[i % len(urls)])
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meals', type=int, default=60)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        seed(app, args.meals)
+        client = app.test_client()
+
+        results = {}
+        for enabled in (False, True):
+            menu_cache.enabled = enabled
+            menu_cache.bump()
+            menu_cache.hits = menu_cache.misses = 0
+            run(client, 200)  # warm up
+            results[enabled] = run(client, args.requests)
+            print(f"cache {'on ' if enabled else 'off'}: {results[enabled]:8.0f} req/s  {menu_cache.stats()}")
+
+        print(f"speedup: {results[True] / results[False]:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure what /metrics instrumentation costs per request: the same mix of
+cached and database-backed requests with METRICS_ENABLED off and on.
+Run from the backend directory: python -m benchmarks.metrics_overhead_bench
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from app import create_app
+from config import Config
+from models import db, User, Order, OrderItem
+from services.session_tokens import issue_token
+from benchmarks.menu_cache_bench import seed
+
+def make_app(db_path, enabled):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        METRICS_ENABLED = enabled
+
+    return create_app(BenchConfig)
+
+def run(app, token, requests):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    urls = ['/api/meals', '/api/meals/1', '/api/orders/user/1?limit=20', '/api/loyalty/1']
+    timings = []
+    for i in range(requests):
+        started = time.perf_counter()
+        response = client.get(urls[i % len(urls)], headers=headers)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    timings.sort()
+    return sum(timings) / len(timings), timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        apps = {enabled: make_app(path, enabled) for enabled in (False, True)}
+        seed(apps[False], 60)
+        with apps[False].app_context():
+            db.session.add(User(sap_id='bench', name='Bench User', loyalty_points=100))
+            db.session.add_all([
+                Order(user_id=1, total=50, items=[OrderItem(meal_id=1, name='Meal 0', qty=1, unit_price=50)])
+                for _ in range(40)
+            ])
+            db.session.commit()
+            token = issue_token(1)
+
+        # Interleave rounds so drift (caches, CPU boost) hits both sides equally
+        results = {False: [], True: []}
+        for _ in range(args.rounds):
+            for enabled, app in apps.items():
+                results[enabled].append(run(app, token, args.requests))
+
+    off = min(mean for mean, _ in results[False])
+    on = min(mean for mean, _ in results[True])
+    print(f"metrics off: {off * 1e6:.0f}µs/request")
+    print(f"metrics on:  {on * 1e6:.0f}µs/request")
+    print(f"overhead:    {(on - off) * 1e6:+.0f}µs/request ({(on - off) / off:+.1%})")
+
+if __name__ == '__main__':
+    main()
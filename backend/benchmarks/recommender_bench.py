@@ -0,0 +1,69 @@
+"""
+Build the local recommender from synthetic order history and time
+per-user recommendations.
+Run from the backend directory: python -m benchmarks.recommender_bench
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from models import db, User, Order, OrderItem
+from services.recommender import recommender
+from benchmarks.menu_cache_bench import make_app, seed
+
+def seed_orders(app, users, orders, meal_count):
+    rng = random.Random(7)
+    start = datetime.utcnow() - timedelta(days=60)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'sap_id': f'bench-{i}', 'name': f'Bench User {i}'} for i in range(users)
+        ])
+        db.session.execute(insert(Order), [
+            {'user_id': rng.randint(1, users), 'total': 100, 'status': 'Completed',
+             'created_at': start + timedelta(minutes=rng.randint(0, 60 * 24 * 60))}
+            for _ in range(orders)
+        ])
+        db.session.execute(insert(OrderItem), [
+            {'order_id': order_id, 'meal_id': meal_id, 'name': f'Meal {meal_id - 1}', 'qty': 1, 'unit_price': 50}
+            for order_id in range(1, orders + 1)
+            for meal_id in rng.sample(range(1, meal_count + 1), rng.randint(1, 3))
+        ])
+        db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meals', type=int, default=60)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        seed(app, args.meals)
+        seed_orders(app, args.users, args.orders, args.meals)
+
+        with app.app_context():
+            started = time.perf_counter()
+            recommender.sync()
+            build = time.perf_counter() - started
+
+            recommender.recommend(1)  # load the catalog
+            timings = []
+            for i in range(args.requests):
+                started = time.perf_counter()
+                recommender.recommend(i % args.users + 1)
+                timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    print(f"Build from {args.orders} orders: {build:.2f}s")
+    print(f"recommend(): p50 {timings[len(timings) // 2] * 1e6:.0f}µs, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f}µs")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure worker cold start: wall time and peak RSS of importing the app and
+running create_app() in a fresh interpreter, plus the heaviest imports from
+`python -X importtime`. Fails when a module that should load lazily is
+imported at startup, or when --max-ms / --max-rss-mb budgets are exceeded.
+Run from the backend directory: python -m benchmarks.startup_bench
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Loaded on first use only; importing any of these at boot is a regression
+LAZY_MODULES = ['google.generativeai', 'google.ai.generativelanguage', 'grpc']
+
+WORKER = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(json.dumps({
+    'ms': (time.perf_counter() - started) * 1000,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'loaded': [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+def boot(database_url, importtime=False):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', WORKER]
+    result = subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def heaviest_imports(importtime_log, count):
+    """Top-level packages by import time of all their modules, in ms"""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        root = name.strip().split('.')[0]
+        totals[root] = totals.get(root, 0) + int(self_us)
+    return sorted(((us / 1000, name) for name, us in totals.items()), reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, help='fail if the median boot takes longer')
+    parser.add_argument('--max-rss-mb', type=float, help='fail if peak RSS after boot is higher')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///' + os.path.join(tmp, 'startup.db')
+        boot(database_url)  # create the schema so every measured run does the same work
+        runs = [boot(database_url)[0] for _ in range(args.runs)]
+        _, importtime_log = boot(database_url, importtime=True)
+
+    report = {
+        'bootMs': {
+            'median': round(statistics.median(run['ms'] for run in runs), 1),
+            'min': round(min(run['ms'] for run in runs), 1)
+        },
+        'rssMb': round(max(run['rss_kb'] for run in runs) / 1024, 1),
+        'eagerlyLoaded': sorted({name for run in runs for name in run['loaded']}),
+        'heaviestImportsMs': {name: round(ms, 1) for ms, name in heaviest_imports(importtime_log, args.top)}
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report['eagerlyLoaded']:
+        failures.append(f"lazy modules imported at boot: {', '.join(report['eagerlyLoaded'])}")
+    if args.max_ms and report['bootMs']['median'] > args.max_ms:
+        failures.append(f"boot {report['bootMs']['median']}ms > {args.max_ms}ms")
+    if args.max_rss_mb and report['rssMb'] > args.max_rss_mb:
+        failures.append(f"RSS {report['rssMb']}MB > {args.max_rss_mb}MB")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
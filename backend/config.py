@@ -3,14 +3,121 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Signs session tokens; the app refuses to start with it outside debug mode
+DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEV_SECRET_KEY
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///quickplate.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Connection pool (QueuePool for file SQLite and Postgres; in-memory SQLite
+    # uses a single static connection, so the sizing options are dropped there)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+    
+    # Applied to every new SQLite connection. WAL lets readers run alongside
+    # the single writer, and busy_timeout makes writers wait for the lock
+    # instead of failing with "database is locked". Set to {} to disable.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+    }
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     
+    # Gemini calls: per-call deadline, concurrent calls per worker, and the
+    # circuit breaker (consecutive failures before opening, seconds open)
+    AI_TIMEOUT_SECONDS = float(os.environ.get('AI_TIMEOUT_SECONDS', 8))
+    AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 4))
+    AI_BREAKER_FAILURES = int(os.environ.get('AI_BREAKER_FAILURES', 5))
+    AI_BREAKER_COOLDOWN = int(os.environ.get('AI_BREAKER_COOLDOWN', 30))
+    
+    # Cache for history-free chat answers (LRU entries, seconds)
+    AI_CHAT_CACHE_SIZE = int(os.environ.get('AI_CHAT_CACHE_SIZE', 512))
+    AI_CHAT_CACHE_TTL = int(os.environ.get('AI_CHAT_CACHE_TTL', 3600))
+    
+    # Lifetime of the signed session tokens issued at login, in seconds
+    TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 30 * 24 * 3600))
+    
     # CORS settings
     CORS_HEADERS = 'Content-Type'
     
+    # Password hashing. Keep the parameters in the method string: stored hashes
+    # whose prefix differs are rehashed transparently on the next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 = hash on the request thread
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Menu cache (GET /api/meals). The TTL is a backstop for menu edits made
+    # from another process, which this process's version counter can't see.
+    MENU_CACHE_ENABLED = os.environ.get('MENU_CACHE_ENABLED', 'true').lower() == 'true'
+    MENU_CACHE_TTL = int(os.environ.get('MENU_CACHE_TTL', 60))
+    
+    # Kitchen scheduler
+    KITCHEN_STATIONS = int(os.environ.get('KITCHEN_STATIONS', 4))
+    KITCHEN_BATCH_WINDOW_MINUTES = int(os.environ.get('KITCHEN_BATCH_WINDOW_MINUTES', 10))
+    KITCHEN_MAX_BATCH = int(os.environ.get('KITCHEN_MAX_BATCH', 10))
+    KITCHEN_DEFAULT_PREP_TIME = 10  # minutes, for items without a Meal.prep_time
+    KITCHEN_SYNC_SECONDS = int(os.environ.get('KITCHEN_SYNC_SECONDS', 5))
+    # How far back each sync re-reads, for transactions that commit after later ones
+    KITCHEN_SYNC_OVERLAP_SECONDS = int(os.environ.get('KITCHEN_SYNC_OVERLAP_SECONDS', 30))
+    
+    # Pickup slots (canteen wall-clock time). Capacity is in prep-minutes per
+    # slot; unset means KITCHEN_STATIONS x PICKUP_SLOT_MINUTES.
+    PICKUP_SLOT_MINUTES = int(os.environ.get('PICKUP_SLOT_MINUTES', 15))
+    PICKUP_OPEN = os.environ.get('PICKUP_OPEN', '08:00')
+    PICKUP_CLOSE = os.environ.get('PICKUP_CLOSE', '21:00')
+    PICKUP_SLOT_CAPACITY = int(os.environ['PICKUP_SLOT_CAPACITY']) if os.environ.get('PICKUP_SLOT_CAPACITY') else None
+    PICKUP_SLOT_SYNC_SECONDS = int(os.environ.get('PICKUP_SLOT_SYNC_SECONDS', 5))
+    
+    # Logging and /metrics instrumentation
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 5))
+    
+    # Local recommender: meals returned, and how often orders from other workers are read
+    RECOMMENDER_TOP_N = int(os.environ.get('RECOMMENDER_TOP_N', 3))
+    RECOMMENDER_SYNC_SECONDS = int(os.environ.get('RECOMMENDER_SYNC_SECONDS', 30))
+    # Load the order history in the background (gunicorn worker boot or first
+    # recommendation); off, the first recommendation loads it inline
+    RECOMMENDER_WARM_UP = os.environ.get('RECOMMENDER_WARM_UP', 'true').lower() == 'true'
+    # Let Gemini reorder the local shortlist (costs one model call per request)
+    RECOMMENDER_LLM_RERANK = os.environ.get('RECOMMENDER_LLM_RERANK', 'false').lower() == 'true'
+    
+    # Order status event streams (SSE)
+    ORDER_EVENTS_HEARTBEAT = int(os.environ.get('ORDER_EVENTS_HEARTBEAT', 15))  # seconds
+    ORDER_EVENTS_POLL_SECONDS = float(os.environ.get('ORDER_EVENTS_POLL_SECONDS', 1))
+    ORDER_EVENTS_MAX_QUEUE = 100
+    # How long the poller waits for an event id skipped by a later commit, in seconds
+    ORDER_EVENTS_GAP_SECONDS = int(os.environ.get('ORDER_EVENTS_GAP_SECONDS', 30))
+    
+    # How long a POST /api/orders Idempotency-Key is remembered, in seconds
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+    
+    # Canteen management endpoints (/api/admin/*), sent as X-Admin-Key; unset disables them
+    ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
+    
+    # Next-day prep forecast (/api/admin/forecast): same-weekday mean over FORECAST_WEEKS
+    # weeks. FORECAST_MODEL is one of MODELS in services/forecast.py (compare them with
+    # manage.py forecast-backtest); the ewma ones weight each week back FORECAST_DECAY
+    # times the one after it.
+    FORECAST_MODEL = os.environ.get('FORECAST_MODEL', 'mean')
+    FORECAST_WEEKS = int(os.environ.get('FORECAST_WEEKS', 8))
+    FORECAST_DECAY = float(os.environ.get('FORECAST_DECAY', 0.8))
+    
+    # Rows per hour that orders spread their sales rollup upserts over, so
+    # concurrent checkouts don't all wait on one row lock (Postgres)
+    ROLLUP_SHARDS = int(os.environ.get('ROLLUP_SHARDS', 8))
+    
     # Pagination
     ITEMS_PER_PAGE = 20
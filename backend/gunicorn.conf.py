@@ -0,0 +1,10 @@
+"""
+gunicorn settings, read from the working directory when the Procfile starts
+gunicorn. Only the web server warms the recommender: scripts calling
+create_app() (manage.py, seed_db.py, benchmarks) never load its history.
+"""
+
+def post_worker_init(worker):
+    from services.recommender import recommender
+    if recommender.warm_up_enabled:
+        recommender.warm_up()
@@ -0,0 +1,199 @@
+"""
+QuickPlate management commands
+Usage: python manage.py <command> [options]
+"""
+
+import argparse
+import contextlib
+import sys
+
+def db_audit(args):
+    """EXPLAIN every query the API issues and fail on full table scans"""
+    from services.db_audit import run_audit
+    
+    results, failures = run_audit(args.database_url)
+    flagged = [result for result in results if result['scans']]
+    
+    print(f"\n=== Query Plan Audit ({len(results)} statements) ===\n")
+    for result in results:
+        marker = '❌' if result['scans'] else '✅'
+        print(f"{marker} {result['statement']}")
+        if result['scans'] or args.verbose:
+            for line in result['plan']:
+                print(f"      {line}")
+    
+    for failure in failures:
+        print(f"❌ {failure}")
+    
+    if flagged:
+        print(f"\n❌ {len(flagged)} statement(s) do a full scan of: "
+              f"{', '.join(sorted({t for r in flagged for t in r['scans']}))}")
+    if failures:
+        print(f"\n❌ {len(failures)} route(s) not audited or failing")
+    if flagged or failures:
+        return 1
+    
+    print("\n✅ No full table scans, every route audited")
+    return 0
+
+def loyalty_reconcile(args):
+    """Compare cached loyalty balances with the ledger"""
+    from app import create_app
+    from services.loyalty_ledger import reconcile
+    
+    app = create_app()
+    with app.app_context():
+        mismatches = reconcile(fix=args.fix)
+    
+    for user_id, cached, ledger in mismatches:
+        print(f"User {user_id}: cached {cached}, ledger {ledger}")
+    
+    if not mismatches:
+        print("✅ Every cached balance matches the ledger")
+        return 0
+    if args.fix:
+        print(f"✅ Reset {len(mismatches)} cached balance(s) to the ledger sum")
+        return 0
+    print(f"❌ {len(mismatches)} balance(s) differ from the ledger (rerun with --fix to repair)")
+    return 1
+
+def export(args):
+    """Stream users, meals or orders to CSV or JSON Lines with constant memory"""
+    from app import create_app
+    from services import ops
+    
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    progress = lambda count: print(f"   {count} rows", end='\r', file=sys.stderr)
+    
+    # Keep startup chatter out of the exported data
+    with contextlib.redirect_stdout(sys.stderr):
+        app = create_app()
+    with app.app_context():
+        try:
+            rows = ops.stream(args.table, args.chunk_size, since=args.since, until=args.until,
+                              user=args.user, status=args.status, has_password=args.has_password)
+            count = ops.write(rows, args.format, out, progress)
+        finally:
+            if args.output:
+                out.close()
+    
+    print(f"✅ Exported {count} {args.table} row(s)", file=sys.stderr)
+    return 0
+
+def cleanup_users(args):
+    """Delete legacy users without a password, in batches"""
+    from app import create_app
+    from services import ops
+    
+    progress = lambda count: print(f"   deleted {count}", end='\r')
+    
+    app = create_app()
+    with app.app_context():
+        deleted, kept = ops.delete_passwordless_users(args.batch_size, args.dry_run, progress)
+    
+    verb = 'Would delete' if args.dry_run else 'Deleted'
+    print(f"✅ {verb} {deleted} legacy user(s) with no password set")
+    if kept:
+        print(f"⚠️  Kept {kept} passwordless user(s) who have orders")
+    return 0
+
+def prune_idempotency_keys(args):
+    """Delete order Idempotency-Keys older than IDEMPOTENCY_KEY_TTL"""
+    from app import create_app
+    from services import idempotency
+    
+    app = create_app()
+    with app.app_context():
+        deleted = idempotency.prune(args.batch_size)
+    
+    print(f"✅ Deleted {deleted} expired idempotency key(s)")
+    return 0
+
+def rollup_rebuild(args):
+    """Recompute the sales rollups behind /api/admin/stats from orders and the ledger"""
+    from app import create_app
+    from models import db
+    from services import ops, rollups
+    
+    app = create_app()
+    with app.app_context():
+        hours = rollups.rebuild(ops.parse_date(args.since) if args.since else None)
+        db.session.commit()
+    
+    print(f"✅ Rebuilt {hours} hour(s) of sales rollups")
+    return 0
+
+def forecast_backtest(args):
+    """Score the prep forecast models on the last few complete weeks of sales"""
+    import time
+    from app import create_app
+    from services import forecast
+    
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        report = forecast.backtest(args.holdout_weeks, weeks=args.weeks, decay=args.decay)
+        elapsed = time.perf_counter() - started
+    
+    print(f"📈 {report['from']} to {report['to']}: {report['sold']} item(s) of {report['meals']} meal(s)"
+          f" sold, predicted a day ahead ({elapsed:.2f}s)")
+    print(f"   {'model':<12}{'MAE/day':>9}{'WAPE':>8}{'bias':>8}{'hourly':>8}   WAPE of the last weeks")
+    for name, scores in report['models'].items():
+        weekly = ' '.join(f"{value:.0%}" for value in scores['weekly_wape'][-8:])
+        print(f"   {name:<12}{scores['mae']:>9.2f}{scores['wape']:>8.1%}{scores['bias']:>+8.1%}"
+              f"{scores['wape_hourly']:>8.1%}   {weekly}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='QuickPlate management commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    audit = commands.add_parser('db-audit', help=db_audit.__doc__)
+    audit.add_argument('--database-url', help='Scratch database to audit (default: a temporary SQLite file)')
+    audit.add_argument('-v', '--verbose', action='store_true', help='Print every query plan')
+    audit.set_defaults(func=db_audit)
+    
+    loyalty = commands.add_parser('loyalty-reconcile', help=loyalty_reconcile.__doc__)
+    loyalty.add_argument('--fix', action='store_true', help='Reset cached balances to the ledger sum')
+    loyalty.set_defaults(func=loyalty_reconcile)
+    
+    exporter = commands.add_parser('export', help=export.__doc__)
+    exporter.add_argument('table', choices=['users', 'meals', 'orders'])
+    exporter.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    exporter.add_argument('-o', '--output', help='File to write (default: stdout)')
+    exporter.add_argument('--since', help='Created on or after (YYYY-MM-DD or ISO timestamp)')
+    exporter.add_argument('--until', help='Created on or before (YYYY-MM-DD includes the whole day)')
+    exporter.add_argument('--user', type=int, help='Only this user id (users, orders)')
+    exporter.add_argument('--status', help='Only orders with this status')
+    passwords = exporter.add_mutually_exclusive_group()
+    passwords.add_argument('--has-password', dest='has_password', action='store_true', default=None,
+                           help='Only users who set a password')
+    passwords.add_argument('--no-password', dest='has_password', action='store_false',
+                           help='Only legacy users without a password')
+    exporter.add_argument('--chunk-size', type=int, default=1000, help='Rows fetched per round trip')
+    exporter.set_defaults(func=export)
+    
+    cleanup = commands.add_parser('cleanup-users', help=cleanup_users.__doc__)
+    cleanup.add_argument('--batch-size', type=int, default=1000, help='Users deleted per transaction')
+    cleanup.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+    cleanup.set_defaults(func=cleanup_users)
+    
+    prune = commands.add_parser('prune-idempotency-keys', help=prune_idempotency_keys.__doc__)
+    prune.add_argument('--batch-size', type=int, default=1000, help='Keys deleted per transaction')
+    prune.set_defaults(func=prune_idempotency_keys)
+    
+    rebuild = commands.add_parser('rollup-rebuild', help=rollup_rebuild.__doc__)
+    rebuild.add_argument('--since', help='Only recompute from this date on (YYYY-MM-DD or ISO timestamp)')
+    rebuild.set_defaults(func=rollup_rebuild)
+    
+    backtest = commands.add_parser('forecast-backtest', help=forecast_backtest.__doc__)
+    backtest.add_argument('--holdout-weeks', type=int, default=4, help='Most recent complete weeks to predict')
+    backtest.add_argument('--weeks', type=int, help='Weeks of history per prediction (default: FORECAST_WEEKS)')
+    backtest.add_argument('--decay', type=float, help='Weight of each week back (default: FORECAST_DECAY)')
+    backtest.set_defaults(func=forecast_backtest)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
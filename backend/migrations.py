@@ -0,0 +1,147 @@
+"""
+Lightweight schema migrations.
+db.create_all() only creates missing tables, so anything added to an
+existing table (columns, indexes, backfills) is applied here on startup. Applied
+migration names are recorded in schema_migrations so one-off backfills
+only ever run once per database.
+"""
+
+import json
+from datetime import datetime
+from sqlalchemy import inspect, insert, select, text
+from models import db
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('name', db.String(100), primary_key=True),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+BATCH_SIZE = 1000
+
+def _column_names(table):
+    return {column['name'] for column in inspect(db.engine).get_columns(table)}
+
+def _add_column(model, name, backfill=None):
+    """Add model.<name> to an existing table if it is missing"""
+    table = model.__table__
+    if name in _column_names(table.name):
+        return False
+    
+    column_type = table.c[name].type.compile(dialect=db.engine.dialect)
+    db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+    if backfill:
+        db.session.execute(text(backfill))
+    return True
+
+def add_updated_at():
+    """updated_at columns used for ETags"""
+    from models import User, Meal, Order, Offer
+    
+    _add_column(User, 'updated_at', 'UPDATE users SET updated_at = created_at')
+    _add_column(Meal, 'updated_at', 'UPDATE meals SET updated_at = CURRENT_TIMESTAMP')
+    _add_column(Order, 'updated_at', 'UPDATE orders SET updated_at = created_at')
+    _add_column(Offer, 'updated_at', 'UPDATE offers SET updated_at = CURRENT_TIMESTAMP')
+
+def backfill_order_items():
+    """Copy line items out of the legacy orders.items JSON blob into order_items"""
+    from models import Order, OrderItem
+    
+    already_done = select(OrderItem.order_id).distinct()
+    rows = db.session.execute(
+        select(Order.id, Order.items_json)
+        .where(Order.items_json != '[]', Order.id.not_in(already_done))
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    
+    batch = []
+    for order_id, blob in rows:
+        try:
+            items = json.loads(blob) if blob else []
+        except ValueError:
+            print(f"⚠️  Skipping order {order_id}: unreadable items JSON")
+            continue
+        
+        for data in items:
+            item = OrderItem.from_dict(data)
+            batch.append({
+                'order_id': order_id,
+                'meal_id': item.meal_id,
+                'name': item.name,
+                'qty': item.qty,
+                'unit_price': item.unit_price
+            })
+        
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(insert(OrderItem), batch)
+            batch = []
+    
+    if batch:
+        db.session.execute(insert(OrderItem), batch)
+
+def open_loyalty_ledger():
+    """Seed the ledger with each user's existing balance"""
+    db.session.execute(text(
+        "INSERT INTO loyalty_transactions (user_id, delta, reason, created_at) "
+        "SELECT id, loyalty_points, 'opening_balance', CURRENT_TIMESTAMP "
+        "FROM users WHERE loyalty_points IS NOT NULL AND loyalty_points != 0"
+    ))
+
+def add_order_pickup_slot():
+    """orders.pickup_slot_id; existing orders keep their free-text pickup_time only"""
+    from models import Order
+    
+    _add_column(Order, 'pickup_slot_id')
+
+def build_sales_rollups():
+    """Fill sales_hourly / item_sales_hourly from existing orders and the ledger"""
+    from services import rollups
+    
+    rollups.rebuild()
+
+def shard_sales_rollups():
+    """Rollup tables keyed by (hour[, meal], shard); they are derived data, so recreate and rebuild them"""
+    from models import SalesHourly, ItemSalesHourly
+    from services import rollups
+    
+    if 'shard' in _column_names(SalesHourly.__tablename__):
+        return
+    connection = db.session.connection()
+    for model in (SalesHourly, ItemSalesHourly):
+        model.__table__.drop(bind=connection)
+        model.__table__.create(bind=connection)
+    rollups.rebuild()
+
+# Applied in order; new migrations go at the end
+MIGRATIONS = [
+    add_updated_at,
+    backfill_order_items,
+    open_loyalty_ledger,
+    add_order_pickup_slot,
+    build_sales_rollups,
+    shard_sales_rollups,
+]
+
+def ensure_indexes():
+    """Create any index declared on the models that the database is missing"""
+    connection = db.session.connection()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+def run_migrations():
+    applied = set(db.session.execute(select(schema_migrations.c.name)).scalars())
+    
+    for migration in MIGRATIONS:
+        if migration.__name__ in applied:
+            continue
+        migration()
+        db.session.execute(schema_migrations.insert().values(
+            name=migration.__name__,
+            applied_at=datetime.utcnow()
+        ))
+        print(f"✅ Applied migration {migration.__name__}")
+    
+    # Runs every startup: create_all() skips indexes on tables that already exist
+    ensure_indexes()
+    db.session.commit()
@@ -1,6 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
 
 db = SQLAlchemy()
 
@@ -16,6 +15,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(255))
     loyalty_points = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     orders = db.relationship('Order', backref='user', lazy=True)
     
@@ -41,6 +41,12 @@ class Meal(db.Model):
     description = db.Column(db.Text)
     available = db.Column(db.Boolean, default=True)
     prep_time = db.Column(db.Integer)  # in minutes
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Menu listing: available=True with an optional category filter
+        db.Index('ix_meals_available_category', 'available', 'category'),
+    )
     
     def to_dict(self):
         return {
@@ -58,18 +64,25 @@ class Order(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    items = db.Column(db.Text, nullable=False)  # JSON string
+    # Legacy JSON blob, backfilled into order_items; new orders leave it empty
+    items_json = db.Column('items', db.Text, nullable=False, default='[]')
     total = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(50), default='Placed')  # Placed, Preparing, Ready, Completed
+    status = db.Column(db.String(50), default='Placed', index=True)  # Placed, Preparing, Ready, Completed
     pickup_time = db.Column(db.String(50))
+    pickup_slot_id = db.Column(db.Integer, db.ForeignKey('pickup_slots.id'))  # None for orders placed before slots
     payment_method = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # selectin: one extra query per page of orders instead of one per order
+    items = db.relationship('OrderItem', backref='order', lazy='selectin',
+                            cascade='all, delete-orphan', order_by='OrderItem.id')
     
     def to_dict(self):
         return {
             'id': f'ORD-{self.id}',
             'userId': self.user_id,
-            'items': json.loads(self.items),
+            'items': [item.to_dict() for item in self.items],
             'total': self.total,
             'status': self.status,
             'pickupTime': self.pickup_time,
@@ -77,6 +90,66 @@ class Order(db.Model):
             'date': self.created_at.isoformat()
         }
 
+# Keyset pagination of a user's order history; also serves plain user_id lookups
+db.Index('ix_orders_user_id_created_at', Order.user_id, Order.created_at.desc())
+
+class OrderItem(db.Model):
+    __tablename__ = 'order_items'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meals.id', ondelete='SET NULL'))
+    name = db.Column(db.String(100), nullable=False)  # snapshot, survives menu edits
+    qty = db.Column(db.Integer, nullable=False, default=1)
+    unit_price = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        # Per-meal sales aggregations
+        db.Index('ix_order_items_meal_id_order_id', 'meal_id', 'order_id'),
+    )
+    
+    @staticmethod
+    def from_dict(data):
+        """Build a line item from the client's {mealId, name, quantity, price}"""
+        meal_id = data.get('mealId')
+        return OrderItem(
+            meal_id=int(meal_id) if str(meal_id).isdigit() else None,
+            name=data.get('name') or 'Unknown',
+            qty=int(data.get('quantity') or 1),
+            unit_price=float(data.get('price') or 0)
+        )
+    
+    def to_dict(self):
+        return {
+            'mealId': str(self.meal_id) if self.meal_id is not None else None,
+            'name': self.name,
+            'quantity': self.qty,
+            'price': self.unit_price
+        }
+
+class LoyaltyTransaction(db.Model):
+    """Append-only ledger; users.loyalty_points is a cached sum of delta"""
+    __tablename__ = 'loyalty_transactions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    delta = db.Column(db.Integer, nullable=False)  # + earned, - spent
+    reason = db.Column(db.String(30), nullable=False)  # order_earn, order_redeem, offer_redeem, opening_balance, ...
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    offer_id = db.Column(db.Integer, db.ForeignKey('offers.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'userId': self.user_id,
+            'delta': self.delta,
+            'reason': self.reason,
+            'orderId': f'ORD-{self.order_id}' if self.order_id else None,
+            'offerId': str(self.offer_id) if self.offer_id else None,
+            'date': self.created_at.isoformat()
+        }
+
 class Offer(db.Model):
     __tablename__ = 'offers'
     
@@ -85,7 +158,8 @@ class Offer(db.Model):
     description = db.Column(db.Text)
     points_required = db.Column(db.Integer, nullable=False)
     discount_amount = db.Column(db.Float, nullable=False)
-    active = db.Column(db.Boolean, default=True)
+    active = db.Column(db.Boolean, default=True, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -96,3 +170,120 @@ class Offer(db.Model):
             'discountAmount': self.discount_amount,
             'active': self.active
         }
+
+class PickupSlot(db.Model):
+    """
+    One pickup window of a day. Capacity and reservations are in
+    prep-minutes (sum of Meal.prep_time x quantity of the orders in it).
+    Rows are created for a whole day the first time an order needs one.
+    """
+    __tablename__ = 'pickup_slots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    start_minute = db.Column(db.Integer, nullable=False)  # minutes after midnight, canteen time
+    capacity = db.Column(db.Integer, nullable=False)
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('date', 'start_minute', name='uq_pickup_slots_date_start'),
+    )
+
+class SalesHourly(db.Model):
+    """Order totals per UTC hour, kept current by create_order (see services/rollups.py)"""
+    __tablename__ = 'sales_hourly'
+    
+    hour = db.Column(db.DateTime, primary_key=True)  # created_at truncated to the hour
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)  # readers sum the shards
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    items = db.Column(db.Integer, nullable=False, default=0)  # quantity across all lines
+    revenue = db.Column(db.Float, nullable=False, default=0)  # order totals, before points
+    points_issued = db.Column(db.Integer, nullable=False, default=0)
+    points_redeemed = db.Column(db.Integer, nullable=False, default=0)
+
+class ItemSalesHourly(db.Model):
+    """Quantity and revenue per meal per UTC hour; category is denormalized for per-category sums"""
+    __tablename__ = 'item_sales_hourly'
+    
+    hour = db.Column(db.DateTime, primary_key=True)
+    meal_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50))
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class IdempotencyKey(db.Model):
+    """Stored response of a POST /api/orders, replayed when the client retries with the same key"""
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)  # client-chosen Idempotency-Key header
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status_code = db.Column(db.Integer, nullable=False)
+    response = db.Column(db.Text, nullable=False)  # JSON body
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        # One row per user and key: the insert is what serializes concurrent retries
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+
+class OrderEvent(db.Model):
+    """
+    Append-only log of order status changes, written in the same transaction
+    as the change. The id is the SSE event id and the cursor other workers poll.
+    """
+    __tablename__ = 'order_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Latest event of an order, and a user's events after a Last-Event-ID
+        db.Index('ix_order_events_order_id_id', 'order_id', 'id'),
+        db.Index('ix_order_events_user_id_id', 'user_id', 'id'),
+    )
+
+class UserRecommendation(db.Model):
+    """Top-N meals per user and daypart, written by recommendations_job.py"""
+    __tablename__ = 'user_recommendations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    daypart = db.Column(db.String(20), nullable=False)  # Breakfast, Lunch, Snacks, Dinner
+    rank = db.Column(db.Integer, nullable=False)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meals.id', ondelete='CASCADE'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50))
+    reason = db.Column(db.String(200))
+    score = db.Column(db.Float, nullable=False)
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # The only read: one user's list for the current daypart, in rank order
+        db.Index('ix_user_recommendations_lookup', 'user_id', 'daypart', 'rank'),
+    )
+    
+    def to_dict(self):
+        return {
+            'mealId': str(self.meal_id),
+            'name': self.name,
+            'reason': self.reason,
+            'category': self.category
+        }
+
+class RecommendationRun(db.Model):
+    """One run of recommendations_job.py; the last watermark drives incremental refreshes"""
+    __tablename__ = 'recommendation_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    order_watermark = db.Column(db.Integer, nullable=False, default=0)  # highest order id included
+    users = db.Column(db.Integer, nullable=False, default=0)
+    incremental = db.Column(db.Boolean, nullable=False, default=False)
@@ -0,0 +1,103 @@
+"""
+Precompute top-N meal recommendations for every user into the
+user_recommendations table, one list per daypart, so the API serves them
+with a single indexed lookup.
+Run after seed_db.py, then on a schedule (nightly, and before the lunch rush):
+
+    python recommendations_job.py                 # every user with order history
+    python recommendations_job.py --incremental   # only users who ordered since the last run
+"""
+
+import argparse
+import time
+from datetime import datetime
+from sqlalchemy import select, delete, insert
+from app import create_app
+from config import Config
+from models import db, Order, UserRecommendation, RecommendationRun
+from services.recommender import recommender, DAYPARTS
+
+class JobConfig(Config):
+    # The job loads the history itself, in the foreground
+    RECOMMENDER_WARM_UP = False
+
+def users_to_refresh(since_order_id):
+    """Users with an order placed after since_order_id"""
+    return db.session.scalars(
+        select(Order.user_id).where(Order.id > since_order_id).distinct()
+    ).all()
+
+def write_chunk(user_ids, top_n, generated_at):
+    """Replace the stored lists of a chunk of users, ranked in one vectorized pass per daypart"""
+    rows = []
+    for part, daypart in enumerate(DAYPARTS):
+        for user_id, picks in zip(user_ids, recommender.rank(user_ids, part, top_n)):
+            rows.extend(
+                {
+                    'user_id': user_id,
+                    'daypart': daypart,
+                    'rank': rank,
+                    'meal_id': int(pick['mealId']),
+                    'name': pick['name'],
+                    'category': pick['category'],
+                    'reason': pick['reason'],
+                    'score': pick['score'],
+                    'generated_at': generated_at
+                }
+                for rank, pick in enumerate(picks)
+            )
+    
+    db.session.execute(delete(UserRecommendation).where(UserRecommendation.user_id.in_(user_ids)))
+    if rows:
+        db.session.execute(insert(UserRecommendation), rows)
+    db.session.commit()
+    return len(rows)
+
+def run_job(top_n=10, chunk_size=500, incremental=False):
+    last_run = (RecommendationRun.query
+                .filter(RecommendationRun.finished_at.isnot(None))
+                .order_by(RecommendationRun.id.desc())
+                .first())
+    incremental = incremental and last_run is not None
+    run = RecommendationRun(incremental=incremental)
+    db.session.add(run)
+    db.session.commit()
+    
+    started = time.perf_counter()
+    # Every list is scored on the whole history; an incremental run just rewrites fewer of them
+    print("📥 Loading order history...")
+    recommender.sync()
+    
+    if incremental:
+        user_ids = sorted(users_to_refresh(last_run.order_watermark))
+        print(f"🔁 {len(user_ids)} users ordered since run #{last_run.id}")
+    else:
+        user_ids = recommender.users()
+        print(f"👥 {len(user_ids)} users with order history")
+    
+    generated_at = datetime.utcnow()
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        written += write_chunk(user_ids[start:start + chunk_size], top_n, generated_at)
+        print(f"   {min(start + chunk_size, len(user_ids))}/{len(user_ids)} users", end='\r')
+    
+    run.finished_at = datetime.utcnow()
+    run.order_watermark = recommender.watermark
+    run.users = len(user_ids)
+    db.session.commit()
+    print(f"✅ Wrote {written} recommendations for {len(user_ids)} users in {time.perf_counter() - started:.1f}s")
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute per-user meal recommendations')
+    parser.add_argument('--incremental', action='store_true', help='only users who ordered since the last run')
+    parser.add_argument('--top-n', type=int, default=10, help='meals stored per user and daypart')
+    parser.add_argument('--chunk-size', type=int, default=500, help='users ranked per batch')
+    args = parser.parse_args()
+    
+    app = create_app(JobConfig)
+    with app.app_context():
+        run_job(args.top_n, args.chunk_size, args.incremental)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import hmac
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app
+from services import forecast, rollups
+
+admin_bp = Blueprint('admin', __name__)
+
+MAX_RANGE_DAYS = 366
+FORECAST_DAYS_AHEAD = 7
+
+def admin_required(view):
+    """Canteen management endpoints: X-Admin-Key must match ADMIN_API_KEY"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_API_KEY')
+        if not expected:
+            return jsonify({'error': 'Admin API is disabled (ADMIN_API_KEY is not set)'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Key', ''), expected):
+            return jsonify({'error': 'Admin key required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def _date_range():
+    """
+    ?from=&to= as naive UTC [start, end). Dates and timestamps without an
+    offset are canteen local time, like the forecast's days; a bare to= date
+    includes that whole day. Default: the last 7 days.
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    since, until = request.args.get('from'), request.args.get('to')
+    start = datetime.fromisoformat(since) if since else today - timedelta(days=6)
+    end = datetime.fromisoformat(until) if until else today
+    if not until or len(until) == 10:
+        end += timedelta(days=1)
+    return rollups.to_utc(start), rollups.to_utc(end)
+
+@admin_bp.route('/stats', methods=['GET'])
+@admin_required
+def get_stats():
+    """Sales, items, categories and loyalty points over a date range, from the hourly rollups"""
+    try:
+        start, end = _date_range()
+    except ValueError:
+        return jsonify({'error': 'from/to must be YYYY-MM-DD or ISO timestamps'}), 400
+    if end <= start or end - start > timedelta(days=MAX_RANGE_DAYS):
+        return jsonify({'error': f'Date range must be between 1 hour and {MAX_RANGE_DAYS} days'}), 400
+    
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in ('hour', 'day'):
+        return jsonify({'error': 'bucket must be hour or day'}), 400
+    top = max(1, min(request.args.get('top', 10, type=int), 100))
+    
+    return jsonify({
+        'success': True,
+        'from': rollups.to_local(start).isoformat(),
+        'to': rollups.to_local(end).isoformat(),
+        'bucket': bucket,
+        **rollups.stats(start, end, bucket, top)
+    }), 200
+
+@admin_bp.route('/forecast', methods=['GET'])
+@admin_required
+def get_forecast():
+    """Expected quantity per meal (and per hour) on ?date=YYYY-MM-DD, default tomorrow; for prep planning"""
+    today = datetime.now().date()
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if 'date' in request.args else today + timedelta(days=1)
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    if not today - timedelta(days=MAX_RANGE_DAYS) <= day <= today + timedelta(days=FORECAST_DAYS_AHEAD):
+        return jsonify({'error': f'date must be within the last {MAX_RANGE_DAYS} or next {FORECAST_DAYS_AHEAD} days'}), 400
+    
+    return jsonify({
+        'success': True,
+        'date': day.isoformat(),
+        'weekday': day.strftime('%A'),
+        'model': current_app.config['FORECAST_MODEL'],
+        **forecast.forecast(day, today)
+    }), 200
@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from services.ai_service import ai_service
-from models import Order, User
+from services.recommender import recommender
+from models import Order
+from services.session_tokens import login_required
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -30,20 +32,30 @@ def chat():
         }), 500
 
 @ai_bp.route('/recommendations/<int:user_id>', methods=['GET'])
+@login_required
 def get_recommendations(user_id):
     """Get personalized meal recommendations"""
-    # Verify user exists
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
-    # Get user's order history
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).limit(10).all()
-    
-    # Get AI recommendations
-    result = ai_service.get_recommendations(orders)
+    # Precomputed by recommendations_job.py, else scored live from order history
+    # (the session token already vouches for the user)
+    if not current_app.config.get('RECOMMENDER_LLM_RERANK'):
+        recommendations = recommender.precomputed(user_id) or recommender.recommend(user_id)
+    else:
+        # Optional: Gemini reorders a wider shortlist of real, available meals
+        limit = recommender.top_n * 3
+        candidates = recommender.precomputed(user_id, limit) or recommender.recommend(user_id, limit)
+        orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).limit(10).all()
+        recommendations = ai_service.rerank_recommendations(candidates, orders)[:recommender.top_n]
     
     return jsonify({
         'success': True,
-        'recommendations': result['recommendations']
+        'recommendations': recommendations
+    }), 200
+
+@ai_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """AI call latency, timeouts and circuit breaker state"""
+    return jsonify({
+        'success': True,
+        'stats': ai_service.stats(),
+        'recommender': recommender.stats()
     }), 200
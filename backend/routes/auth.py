@@ -1,8 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from models import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.conditional import make_etag, not_modified, tag
+from services.password_hasher import password_hasher, HasherBusy
+from services.session_tokens import issue_token, login_required
+import logging
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
+
+def _busy():
+    """Hashing pool is saturated; tell the client to back off briefly"""
+    response = jsonify({'error': 'Server is busy, please try again in a moment'})
+    response.headers['Retry-After'] = '2'
+    return response, 503
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -21,13 +31,22 @@ def login():
             return jsonify({'error': 'Incorrect SAP ID or Password'}), 401
         
         # Verify password
-        if user.password_hash and check_password_hash(user.password_hash, password):
-            return jsonify({'success': True, 'user': user.to_dict()}), 200
+        if password_hasher.verify(user.password_hash, password):
+            if password_hasher.needs_rehash(user.password_hash):
+                # Upgrade hashes made with older parameters; not worth failing the login over
+                try:
+                    user.password_hash = password_hasher.hash(password)
+                    db.session.commit()
+                except HasherBusy:
+                    pass
+            return jsonify({'success': True, 'user': user.to_dict(), 'token': issue_token(user.id)}), 200
         else:
             return jsonify({'error': 'Incorrect SAP ID or Password'}), 401
             
-    except Exception as e:
-        print(f"Login error: {str(e)}")
+    except HasherBusy:
+        return _busy()
+    except Exception:
+        logger.exception("Login error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/signup', methods=['POST'])
@@ -35,31 +54,28 @@ def signup():
     """Create new user account with Password"""
     try:
         data = request.get_json()
-        print(f"DEBUG: Received Signup Data: {data}") # LOG ALL INCOMING DATA
 
         sap_id = data.get('sapId')
         name = data.get('name')
         password = data.get('password')
         
         if not all([sap_id, name, password]):
-            print(f"DEBUG: Missing fields. sapId={sap_id}, name={name}, password={'*' if password else 'None'}")
+            logger.debug("Signup missing fields: sapId=%s name=%s password=%s", sap_id, bool(name), bool(password))
             return jsonify({'error': 'All fields are required'}), 400
         
         # Check for existing user BY SAP ID ONLY
         existing_user = User.query.filter_by(sap_id=sap_id).first()
         
         if existing_user:
-            print(f"DEBUG: COLLISION DETECTED! Incoming SAP ID: '{sap_id}' matches User ID: {existing_user.id}, SAP ID: '{existing_user.sap_id}', Name: '{existing_user.name}'")
+            logger.info("Signup rejected: SAP ID %s already belongs to user %s", sap_id, existing_user.id)
             return jsonify({'error': f'User with SAP ID {sap_id} already exists'}), 409
         
-        print(f"DEBUG: No collision for SAP ID '{sap_id}'. Creating user...")
-
         new_user = User(
             sap_id=sap_id,
             name=name,
             email=data.get('email', ''),
             phone=data.get('phone', ''),
-            password_hash=generate_password_hash(password),
+            password_hash=password_hasher.hash(password),
             photo_url='https://ui-avatars.com/api/?name=' + name.replace(' ', '+'),
             loyalty_points=0
         )
@@ -67,37 +83,48 @@ def signup():
         db.session.add(new_user)
         db.session.commit()
         
-        print(f"DEBUG: User created successfully. ID: {new_user.id}")
-        return jsonify({'success': True, 'user': new_user.to_dict(), 'message': 'User registered successfully'}), 201
+        logger.info("User %s signed up", new_user.id)
+        return jsonify({
+            'success': True,
+            'user': new_user.to_dict(),
+            'token': issue_token(new_user.id),
+            'message': 'User registered successfully'
+        }), 201
+    except HasherBusy:
+        return _busy()
     except Exception as e:
         db.session.rollback()
-        print(f"DEBUG: Database/Server Error: {str(e)}")
+        logger.exception("Signup failed")
         return jsonify({'error': f'Database error: {str(e)}'}), 500
 
 @auth_bp.route('/change-password', methods=['POST'])
+@login_required
 def change_password():
     """Change user password"""
     data = request.get_json()
-    user_id = data.get('userId')
     old_password = data.get('oldPassword')
     new_password = data.get('newPassword')
     
-    if not all([user_id, old_password, new_password]):
+    if not all([old_password, new_password]):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    user = User.query.get(user_id)
+    user = User.query.get(g.user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    if not check_password_hash(user.password_hash, old_password):
-        return jsonify({'error': 'Incorrect current password'}), 401
-    
-    user.password_hash = generate_password_hash(new_password)
+    try:
+        if not password_hasher.verify(user.password_hash, old_password):
+            return jsonify({'error': 'Incorrect current password'}), 401
+        
+        user.password_hash = password_hasher.hash(new_password)
+    except HasherBusy:
+        return _busy()
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Password updated successfully'}), 200
 
 @auth_bp.route('/users/<int:user_id>', methods=['GET'])
+@login_required
 def get_user(user_id):
     """Get user profile"""
     user = User.query.get(user_id)
@@ -105,9 +132,15 @@ def get_user(user_id):
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify(user.to_dict()), 200
+    etag = make_etag('user', user.id, user.updated_at)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    return tag(jsonify(user.to_dict()), etag), 200
 
 @auth_bp.route('/users/<int:user_id>', methods=['PUT'])
+@login_required
 def update_user(user_id):
     """Update user profile"""
     user = User.query.get(user_id)
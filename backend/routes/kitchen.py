@@ -0,0 +1,36 @@
+from flask import Blueprint, jsonify, g
+from models import Order
+from routes.admin import admin_required
+from services.kitchen import kitchen
+from services.session_tokens import login_required
+
+kitchen_bp = Blueprint('kitchen', __name__)
+
+@kitchen_bp.route('/queue', methods=['GET'])
+@admin_required
+def get_queue():
+    """Batched cooking queue across stations, earliest pickup first (staff: X-Admin-Key)"""
+    batches = kitchen.queue()
+    
+    return jsonify({
+        'success': True,
+        'stations': kitchen.stations,
+        'batches': batches
+    }), 200
+
+@kitchen_bp.route('/orders/<int:order_id>', methods=['GET'])
+@login_required
+def get_order_projection(order_id):
+    """Projected ready time for one of the caller's orders"""
+    order = Order.query.get(order_id)
+    
+    if not order or order.user_id != g.user_id:
+        return jsonify({'error': 'Order not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'orderId': f'ORD-{order.id}',
+        'status': order.status,
+        'pickupTime': order.pickup_time,
+        **kitchen.projection(order.id)
+    }), 200
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
-from models import db, User, Offer
+from flask import Blueprint, request, jsonify, g
+from models import db, User, Offer, LoyaltyTransaction
+from services.conditional import make_etag, not_modified, tag
+from services.session_tokens import login_required
+from services import loyalty_ledger, rollups
 
 loyalty_bp = Blueprint('loyalty', __name__)
 
 @loyalty_bp.route('/<int:user_id>', methods=['GET'])
+@login_required
 def get_loyalty_balance(user_id):
     """Get user's loyalty points balance"""
     user = User.query.get(user_id)
@@ -16,45 +20,69 @@ def get_loyalty_balance(user_id):
         'loyaltyPoints': user.loyalty_points
     }), 200
 
+@loyalty_bp.route('/<int:user_id>/transactions', methods=['GET'])
+@login_required
+def get_transactions(user_id):
+    """Get the user's most recent loyalty ledger entries"""
+    transactions = (
+        LoyaltyTransaction.query.filter_by(user_id=user_id)
+        .order_by(LoyaltyTransaction.id.desc())
+        .limit(50)
+        .all()
+    )
+    
+    return jsonify({
+        'success': True,
+        'transactions': [transaction.to_dict() for transaction in transactions]
+    }), 200
+
 @loyalty_bp.route('/offers', methods=['GET'])
 def get_offers():
     """Get all active loyalty offers"""
+    # Any insert, edit or delete changes the row count or the latest updated_at
+    count, last_updated = db.session.query(db.func.count(Offer.id), db.func.max(Offer.updated_at)).one()
+    etag = make_etag('offers', count, last_updated)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
     offers = Offer.query.filter_by(active=True).all()
     
-    return jsonify({
+    return tag(jsonify({
         'success': True,
         'offers': [offer.to_dict() for offer in offers]
-    }), 200
+    }), etag), 200
 
 @loyalty_bp.route('/redeem', methods=['POST'])
+@login_required
 def redeem_points():
     """Redeem loyalty points for an offer"""
     data = request.get_json()
     
-    user_id = data.get('userId')
+    user_id = g.user_id
     offer_id = data.get('offerId')
     
-    if not all([user_id, offer_id]):
+    if not offer_id:
         return jsonify({'error': 'Missing required fields'}), 400
     
-    user = User.query.get(user_id)
     offer = Offer.query.get(offer_id)
     
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     if not offer or not offer.active:
         return jsonify({'error': 'Offer not found or inactive'}), 404
     
-    if user.loyalty_points < offer.points_required:
+    # Deduct points atomically; fails instead of going negative under concurrency
+    try:
+        loyalty_ledger.debit(user_id, offer.points_required, 'offer_redeem', offer_id=offer.id)
+    except loyalty_ledger.InsufficientPoints:
+        db.session.rollback()
         return jsonify({'error': 'Insufficient loyalty points'}), 400
+    rollups.record_points(redeemed=offer.points_required)
     
-    # Deduct points
-    user.loyalty_points -= offer.points_required
+    remaining_points = loyalty_ledger.balance(user_id)
     db.session.commit()
     
     return jsonify({
         'success': True,
-        'remainingPoints': user.loyalty_points,
+        'remainingPoints': remaining_points,
         'discountAmount': offer.discount_amount
     }), 200
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Meal
+from services.menu_cache import menu_cache
+from services.conditional import make_etag, not_modified, tag
 
 meals_bp = Blueprint('meals', __name__)
 
@@ -8,16 +10,21 @@ def get_meals():
     """Get all meals with optional category filter"""
     category = request.args.get('category')
     
-    query = Meal.query.filter_by(available=True)
+    # Served from the pre-serialized menu cache; the DB is only hit on a miss
+    body, etag = menu_cache.get(category)
     
-    if category and category != 'All':
-        query = query.filter_by(category=category)
-    
-    meals = query.all()
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
+    return tag(current_app.response_class(body, status=200, mimetype='application/json'), etag)
+
+@meals_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Menu cache hit/miss counters"""
     return jsonify({
         'success': True,
-        'meals': [meal.to_dict() for meal in meals]
+        'cache': menu_cache.stats()
     }), 200
 
 @meals_bp.route('/<int:meal_id>', methods=['GET'])
@@ -28,4 +35,9 @@ def get_meal(meal_id):
     if not meal:
         return jsonify({'error': 'Meal not found'}), 404
     
-    return jsonify(meal.to_dict()), 200
+    etag = make_etag('meal', meal.id, meal.updated_at)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    return tag(jsonify(meal.to_dict()), etag), 200
@@ -1,48 +1,119 @@
-from flask import Blueprint, request, jsonify
-from models import db, Order, User
-import json
-from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app, g, Response
+from models import db, Order
+from routes.admin import admin_required
+from services.conditional import make_etag, not_modified, tag
+from services.session_tokens import login_required
+from services import loyalty_ledger
+from services.kitchen import kitchen, parse_clock
+from services.price_index import price_index, UnavailableItems, PriceChanged
+from services import idempotency, rollups, sqlite_profile
+from services.pickup_slots import pickup_slots, OutsideHours, SlotFull
+from services.recommender import recommender
+from services.order_events import order_events, parse_event_id
+from datetime import datetime, timedelta
+import base64
 
 orders_bp = Blueprint('orders', __name__)
 
 @orders_bp.route('/', methods=['POST'])
+@login_required
 def create_order():
     """Create a new order"""
     data = request.get_json()
     
-    user_id = data.get('userId')
+    user_id = g.user_id
     items = data.get('items')
-    total = data.get('total')
     pickup_time = data.get('pickupTime')
     payment_method = data.get('paymentMethod')
     
-    points_used = data.get('pointsUsed', 0)
-    
-    if not all([user_id, items, total]):
+    if not items or not isinstance(items, list):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    # Verify user exists
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    # A retry of an order that already went through gets the same response back
+    key = request.headers.get(idempotency.HEADER)
+    if key is not None:
+        if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'error': f'Invalid {idempotency.HEADER} header'}), 400
+        request_hash = idempotency.fingerprint(data)
+        stored = idempotency.find(user_id, key)
+        if stored:
+            return _replay(stored, request_hash)
     
-    # Handle points deduction (1 point = ₹1)
-    if points_used > 0:
-        if user.loyalty_points < points_used:
-            return jsonify({'error': 'Insufficient loyalty points'}), 400
-        user.loyalty_points -= points_used
+    try:
+        client_total = None if data.get('total') is None else float(data['total'])
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid order total'}), 400
+    
+    # Priced on the server; the client's prices and total are only checked
+    try:
+        points_used = int(data.get('pointsUsed') or 0)
+        order_items, total = price_index.price_items(items)
+    except (ValueError, TypeError, AttributeError, KeyError):
+        return jsonify({'error': 'Invalid order items'}), 400
+    except UnavailableItems as e:
+        return jsonify({
+            'error': 'Some items are no longer available',
+            'unavailable': [str(meal_id) for meal_id in e.meal_ids]
+        }), 409
+    except PriceChanged as e:
+        return jsonify({
+            'error': 'Menu prices have changed, please review your order',
+            'prices': {str(meal_id): price for meal_id, price in e.prices.items()}
+        }), 409
+    
+    if client_total is not None and abs(client_total - total) > 0.005:
+        return jsonify({'error': 'Order total has changed, please review your order', 'total': total}), 409
+    
+    if points_used < 0 or points_used > total:
+        return jsonify({'error': 'Invalid points amount'}), 400
+    
+    # Everything below writes: hold the write lock from the start (SQLite)
+    sqlite_profile.begin_write()
+    
+    record = None
+    if key is not None:
+        record = idempotency.claim(user_id, key, request_hash)
+        if record is None:
+            # Lost the race to a concurrent request with the same key
+            stored = idempotency.find(user_id, key)
+            if stored:
+                return _replay(stored, request_hash)
+            return jsonify({'error': 'A request with this key is already in progress'}), 409
+    
+    try:
+        reservation = pickup_slots.reserve(pickup_time, order_items)
+    except OutsideHours:
+        db.session.rollback()
+        return jsonify({'error': 'Pickup time is outside canteen hours'}), 400
+    except SlotFull as e:
+        db.session.rollback()
+        message = 'This pickup slot is full, please pick another time' if e.alternatives else 'No pickup slots left today'
+        return jsonify({'error': message, 'alternatives': e.alternatives}), 409
+    slot_id, _, slot_start, _ = reservation
+    if not pickup_time or not parse_clock(pickup_time):
+        pickup_time = pickup_slots.label(slot_start)  # ASAP: the slot it was booked into
     
     # Create order
     new_order = Order(
         user_id=user_id,
-        items=json.dumps(items),
+        items=order_items,
         total=total,
         pickup_time=pickup_time,
+        pickup_slot_id=slot_id,
         payment_method=payment_method,
         status='Placed'
     )
     
     db.session.add(new_order)
+    db.session.flush()  # order id for the ledger entries
+    
+    # Handle points deduction (1 point = ₹1)
+    if points_used > 0:
+        try:
+            loyalty_ledger.debit(user_id, points_used, 'order_redeem', order_id=new_order.id)
+        except loyalty_ledger.InsufficientPoints:
+            db.session.rollback()
+            return jsonify({'error': 'Insufficient loyalty points'}), 400
     
     # Award loyalty points (5% of the total bill, 1 point = ₹1)
     # Total billed amount is (total - points_used) assuming points_used is a discount
@@ -50,44 +121,174 @@ def create_order():
     # Usually it's on the actual money paid. Let's use (total - points_used)
     bill_amount = max(0, total - points_used)
     points_earned = int(bill_amount * 0.05)
-    user.loyalty_points += points_earned
+    if not loyalty_ledger.credit(user_id, points_earned, 'order_earn', order_id=new_order.id):
+        db.session.rollback()
+        return jsonify({'error': 'User not found'}), 404
     
-    db.session.commit()
+    rollups.record_order(new_order, points_issued=points_earned, points_redeemed=points_used)
+    event = order_events.record(new_order)
     
-    return jsonify({
+    body = {
         'success': True,
         'order': new_order.to_dict(),
         'pointsEarned': points_earned
-    }), 201
+    }
+    if record is not None:
+        idempotency.save(record, body, 201)
+    
+    db.session.commit()
+    pickup_slots.committed(reservation)
+    kitchen.add_order(new_order)
+    recommender.add_order(new_order)
+    order_events.publish(event)
+    
+    return jsonify(body), 201
+
+def _replay(stored, request_hash):
+    try:
+        return idempotency.replay(stored, request_hash)
+    except idempotency.KeyReused:
+        return jsonify({'error': f'{idempotency.HEADER} was already used for a different order'}), 422
+
+@orders_bp.route('/slots', methods=['GET'])
+def get_pickup_slots():
+    """Remaining capacity (prep-minutes) of each pickup slot on ?date= (default today)"""
+    today = datetime.now().date()
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') else today
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    if not today <= day <= today + timedelta(days=SLOT_DAYS_AHEAD):
+        return jsonify({'error': f'date must be within the next {SLOT_DAYS_AHEAD} days'}), 400
+    
+    return jsonify({
+        'date': day.isoformat(),
+        'slotMinutes': pickup_slots.slot_minutes,
+        'slots': pickup_slots.availability(day)
+    }), 200
+
+SLOT_DAYS_AHEAD = 7
+MAX_PAGE_SIZE = 100
+
+def _encode_cursor(created_at, order_id):
+    raw = f'{created_at.isoformat()}|{order_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    created_at, order_id = raw.split('|')
+    return datetime.fromisoformat(created_at), int(order_id)
 
 @orders_bp.route('/user/<int:user_id>', methods=['GET'])
+@login_required
 def get_user_orders(user_id):
-    """Get all orders for a user"""
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+    """Get a page of a user's orders, newest first (keyset on created_at, id)"""
+    limit = request.args.get('limit', current_app.config['ITEMS_PER_PAGE'], type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
     
-    return jsonify({
+    query = db.session.query(Order.id, Order.created_at, Order.updated_at).filter(Order.user_id == user_id)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        # The plain <= keeps this an index range scan; the OR breaks created_at ties
+        query = query.filter(
+            Order.created_at <= cursor_created_at,
+            db.or_(
+                Order.created_at < cursor_created_at,
+                db.and_(Order.created_at == cursor_created_at, Order.id < cursor_id)
+            )
+        )
+    
+    # Fetch one extra row to know whether there is a next page
+    page = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = _encode_cursor(page[-1].created_at, page[-1].id)
+    
+    # The ETag only depends on this page, so revalidating costs the same for any history length
+    etag = make_etag('orders', user_id, limit, cursor, next_cursor,
+                     *[f'{row.id}:{row.updated_at}' for row in page])
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    ids = [row.id for row in page]
+    orders = Order.query.filter(Order.id.in_(ids)).order_by(Order.created_at.desc(), Order.id.desc()).all() if ids else []
+    
+    return tag(jsonify({
         'success': True,
-        'orders': [order.to_dict() for order in orders]
-    }), 200
+        'orders': [order.to_dict() for order in orders],
+        'nextCursor': next_cursor
+    }), etag), 200
 
 @orders_bp.route('/<int:order_id>/status', methods=['PUT'])
+@admin_required
 def update_order_status(order_id):
-    """Update order status"""
+    """Update order status (kitchen staff)"""
     order = Order.query.get(order_id)
     
     if not order:
         return jsonify({'error': 'Order not found'}), 404
     
-    data = request.get_json()
-    new_status = data.get('status')
+    data = request.get_json(silent=True)
+    new_status = data.get('status') if isinstance(data, dict) else None
     
     if new_status not in ['Placed', 'Preparing', 'Ready', 'Completed']:
         return jsonify({'error': 'Invalid status'}), 400
     
     order.status = new_status
+    event = order_events.record(order)
     db.session.commit()
+    kitchen.order_status_changed(order)
+    order_events.publish(event)
     
     return jsonify({
         'success': True,
         'order': order.to_dict()
     }), 200
+
+def _event_stream(subscription, backlog):
+    """SSE response; the DB session is released before the stream starts waiting"""
+    return Response(
+        subscription.stream(backlog, order_events.heartbeat),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@orders_bp.route('/<int:order_id>/events', methods=['GET'])
+@login_required
+def order_status_events(order_id):
+    """Live status updates for one order (Server-Sent Events)"""
+    # Subscribe before reading so no update can slip in between
+    subscription = order_events.subscribe(f'order:{order_id}')
+    order = Order.query.get(order_id)
+    
+    if not order or order.user_id != g.user_id:
+        order_events.unsubscribe(subscription)
+        return jsonify({'error': 'Order not found'}), 404
+    
+    # Always start with the current state, unless the client already has it
+    since = parse_event_id(request.headers.get('Last-Event-ID'))
+    latest = order_events.latest(order)
+    backlog = [latest] if since is None or latest['id'] > since else []
+    
+    return _event_stream(subscription, backlog)
+
+@orders_bp.route('/user/<int:user_id>/events', methods=['GET'])
+@login_required
+def user_order_events(user_id):
+    """Live status updates for all of a user's orders (Server-Sent Events)"""
+    subscription = order_events.subscribe(f'user:{user_id}')
+    
+    # On reconnect, replay whatever changed since the last event the client saw
+    backlog = []
+    since = parse_event_id(request.headers.get('Last-Event-ID'))
+    if since is not None:
+        backlog = order_events.user_backlog(user_id, since)
+    
+    return _event_stream(subscription, backlog)
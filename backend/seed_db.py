@@ -1,54 +1,303 @@
 """
-Database seeder script to populate initial data
-Run this after setting up the database: python seed_db.py
+Database seeder: the canteen menu and offers, plus optional synthetic
+students and order history at any scale.
+
+    python seed_db.py                                   # menu and offers only
+    python seed_db.py --users 20000 --orders 1000000    # plus a busy campus
+
+Rows are generated with NumPy and written with Core insert() executemany
+in large batches, all inside one transaction. The same --seed always
+produces the same data.
 """
 
-from app import create_app
-from models import db, Meal, Offer
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import bindparam, delete, func, insert, select
+from werkzeug.security import generate_password_hash
+from models import (db, User, Meal, Offer, Order, OrderItem, LoyaltyTransaction,
+                    UserRecommendation, RecommendationRun, IdempotencyKey, PickupSlot, OrderEvent)
+from services import rollups
+
+# name, category, price, prep_time, description
+MENU = [
+    # Breakfast
+    ('Masala Dosa', 'Breakfast', 60, 15, 'Crispy rice crepe served with coconut chutney and potato masala.'),
+    ('Idli Sambar', 'Breakfast', 40, 10, 'Steamed rice cakes served with sambar and chutney.'),
+    ('Poha', 'Breakfast', 30, 10, 'Flattened rice cooked with onions, peas, and spices.'),
+    ('Upma', 'Breakfast', 35, 12, 'Savory semolina porridge with vegetables.'),
+
+    # Lunch
+    ('Veg Thali', 'Lunch', 80, 20, 'Complete meal with rice, roti, dal, sabzi, and curd.'),
+    ('Chole Bhature', 'Lunch', 70, 18, 'Spicy chickpea curry with fried bread.'),
+    ('Rajma Chawal', 'Lunch', 65, 15, 'Kidney bean curry with steamed rice.'),
+    ('Paneer Tikka', 'Lunch', 90, 20, 'Grilled cottage cheese marinated in spices.'),
+
+    # Dinner
+    ('Dal Tadka', 'Dinner', 55, 15, 'Yellow lentils tempered with cumin and garlic.'),
+    ('Palak Paneer', 'Dinner', 85, 18, 'Cottage cheese in creamy spinach gravy.'),
+    ('Aloo Paratha', 'Dinner', 50, 15, 'Stuffed flatbread with spiced potato filling.'),
+
+    # Snacks
+    ('Samosa', 'Snacks', 20, 5, 'Fried pastry with savory filling of spiced potatoes and peas.'),
+    ('Vada Pav', 'Snacks', 25, 8, 'Spiced potato fritter in a bun.'),
+    ('Pav Bhaji', 'Snacks', 60, 15, 'Spiced vegetable mash served with buttered bread.'),
+    ('Coffee', 'Snacks', 15, 5, 'Hot filter coffee.'),
+    ('Tea', 'Snacks', 10, 5, 'Hot masala chai.'),
+]
+
+# title, description, points_required, discount_amount
+OFFERS = [
+    ('Free Coffee', 'Redeem for any hot coffee.', 15, 15),
+    ('₹25 off', '₹25 off your next order.', 25, 25),
+    ('₹50 off', '₹50 off your next order.', 50, 50),
+    ('Free Thali', 'A Veg Thali on the house.', 80, 80),
+]
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya', 'Rahul',
+               'Riya', 'Rohan', 'Saanvi', 'Siddharth', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Yash', 'Zara']
+LAST_NAMES = ['Agarwal', 'Bose', 'Desai', 'Gupta', 'Iyer', 'Jain', 'Kapoor', 'Kulkarni', 'Mehta', 'Nair',
+              'Patel', 'Rao', 'Reddy', 'Shah', 'Sharma', 'Singh', 'Verma']
+
+# Orders per hour of the day (weights); the lunch rush dominates
+HOUR_WEIGHTS = {8: 6, 9: 8, 10: 4, 11: 6, 12: 22, 13: 20, 14: 8, 16: 5, 17: 6, 18: 3, 19: 6, 20: 5, 21: 1}
+# Weekends are quieter on campus
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.9, 0.4, 0.3]
+# Chance an order has 1, 2 or 3 mains, and that a snack or drink is added
+MAINS_WEIGHTS = [0.7, 0.25, 0.05]
+SIDE_CHANCE = 0.35
+
+DEMO_PASSWORD = 'quickplate123'
+
+def _daypart(hour):
+    if hour < 11:
+        return 'Breakfast'
+    if hour < 16:
+        return 'Lunch'
+    if hour < 19:
+        return 'Snacks'
+    return 'Dinner'
+
+def _insert(model, rows):
+    """Core executemany; no ORM objects, no per-row RETURNING"""
+    if rows:
+        db.session.execute(insert(model.__table__), rows)
+
+def _insert_columns(model, columns):
+    """
+    Core insert() executemany for bulk rows given column-wise as lists,
+    handed straight to the driver: skips SQLAlchemy's per-row parameter
+    processing, which costs more than SQLite's own insert at this scale.
+    Values must be driver-ready (plain ints, floats and strings; datetimes
+    as 'YYYY-MM-DD HH:MM:SS.ffffff').
+    """
+    names = list(columns)
+    connection = db.session.connection()
+    compiled = insert(model.__table__).compile(dialect=connection.dialect, column_keys=names)
+    if compiled.positional:
+        rows = list(zip(*(columns[name] for name in compiled.positiontup)))
+    else:
+        rows = [dict(zip(names, values)) for values in zip(*columns.values())]
+    connection.exec_driver_sql(str(compiled), rows)
+
+def _timestamps(values):
+    """datetime64 array -> SQLAlchemy's SQLite DateTime string format"""
+    return np.char.replace(np.datetime_as_string(values, unit='us'), 'T', ' ').tolist()
+
+# '08:05 AM' for every minute of the day
+_CLOCK = [f"{(minute // 60) % 12 or 12:02d}:{minute % 60:02d} {'AM' if minute < 720 else 'PM'}" for minute in range(1440)]
+
+def seed_menu():
+    _insert(Meal, [
+        {'name': name, 'category': category, 'price': price, 'prep_time': prep_time,
+         'description': description, 'available': True}
+        for name, category, price, prep_time, description in MENU
+    ])
+    _insert(Offer, [
+        {'title': title, 'description': description, 'points_required': points, 'discount_amount': discount,
+         'active': True}
+        for title, description, points, discount in OFFERS
+    ])
+
+def seed_users(rng, count, batch_size):
+    """Students with a shared demo password; returns their ids"""
+    first_id = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+    password_hash = generate_password_hash(DEMO_PASSWORD)
+    firsts = rng.integers(len(FIRST_NAMES), size=count)
+    lasts = rng.integers(len(LAST_NAMES), size=count)
+    joined = datetime.utcnow() - timedelta(days=365)
+
+    for start in range(0, count, batch_size):
+        _insert(User, [
+            {'id': first_id + i, 'sap_id': f'6{first_id + i:08d}',
+             'name': f'{FIRST_NAMES[firsts[i]]} {LAST_NAMES[lasts[i]]}',
+             'email': f'student{first_id + i}@campus.edu', 'phone': f'9{first_id + i:09d}',
+             'password_hash': password_hash, 'loyalty_points': 0, 'created_at': joined, 'updated_at': joined}
+            for i in range(start, min(start + batch_size, count))
+        ])
+    return np.arange(first_id, first_id + count)
+
+def _order_times(rng, count, days):
+    """
+    created_at (naive UTC, as the app stores it) for count orders over the last
+    `days` days, following the hour and weekday weights, plus each order's local
+    hour and minute of the day. The weights are canteen local time, so the lunch
+    rush lands at 12:xx on the canteen clock wherever the server runs.
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    day_offsets = np.arange(days, 0, -1)
+    weekdays = np.array([(today - timedelta(days=int(offset))).weekday() for offset in day_offsets])
+    day_weights = np.array(WEEKDAY_WEIGHTS)[weekdays]
+    day_picks = rng.choice(day_offsets, size=count, p=day_weights / day_weights.sum())
+
+    hours = np.array(list(HOUR_WEIGHTS))
+    hour_weights = np.array(list(HOUR_WEIGHTS.values()), dtype=float)
+    hour_picks = rng.choice(hours, size=count, p=hour_weights / hour_weights.sum())
+
+    seconds = hour_picks * 3600 + rng.integers(3600, size=count)
+    order = np.argsort(day_picks * -86400 + seconds, kind='stable')  # ids ascend with time
+    day_picks, hour_picks, seconds = day_picks[order], hour_picks[order], seconds[order]
+
+    # Local -> UTC offset of every (day, hour), so a DST change shifts only the hours after it
+    utc_offsets = np.zeros((days + 1, 24), dtype=np.int64)
+    for offset in day_offsets:
+        for hour in range(24):
+            local = today - timedelta(days=int(offset)) + timedelta(hours=hour)
+            utc_offsets[offset, hour] = (local - rollups.to_utc(local)).total_seconds()
+
+    created = (np.datetime64(today, 'us') - day_picks * np.timedelta64(1, 'D')
+               + (seconds - utc_offsets[day_picks, hour_picks]) * np.timedelta64(1, 's')
+               + rng.integers(10**6, size=count) * np.timedelta64(1, 'us'))
+    return created, hour_picks, seconds // 60
+
+def seed_orders(rng, user_ids, count, days, batch_size):
+    """Multi-item order history; returns points earned per user id"""
+    meals = db.session.execute(select(Meal.id, Meal.name, Meal.category, Meal.price).where(Meal.available == True)).all()
+    meal_ids = np.array([meal.id for meal in meals])
+    prices = np.array([meal.price for meal in meals], dtype=float)
+    names = [meal.name for meal in meals]
+    by_daypart = {part: np.array([i for i, meal in enumerate(meals) if meal.category == part])
+                  for part in ('Breakfast', 'Lunch', 'Snacks', 'Dinner')}
+
+    first_id = (db.session.scalar(select(func.max(Order.id))) or 0) + 1
+    points = np.zeros(int(user_ids.max()) + 1, dtype=np.int64)
+    created, hour_picks, minutes = _order_times(rng, count, days)
+    names = np.array(names, dtype=object)
+    clock = np.array(_CLOCK, dtype=object)
+    in_daypart = {part: np.array([_daypart(hour) == part for hour in range(24)]) for part in by_daypart}
+
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        order_ids = np.arange(first_id + start, first_id + start + size)
+        users = rng.choice(user_ids, size=size)
+        hours = hour_picks[start:start + size]
+
+        # Line items: 1-3 mains from the daypart's menu, sometimes a snack or drink
+        mains = rng.choice(len(MAINS_WEIGHTS), size=size, p=MAINS_WEIGHTS) + 1
+        line_orders, line_meals = [], []
+        for part, candidates in by_daypart.items():
+            in_part = np.flatnonzero(in_daypart[part][hours])
+            repeats = mains[in_part]
+            line_orders.append(np.repeat(in_part, repeats))
+            line_meals.append(candidates[rng.integers(len(candidates), size=repeats.sum())])
+        with_side = np.flatnonzero(rng.random(size) < SIDE_CHANCE)
+        line_orders.append(with_side)
+        line_meals.append(by_daypart['Snacks'][rng.integers(len(by_daypart['Snacks']), size=len(with_side))])
+        line_orders = np.concatenate(line_orders)
+        line_meals = np.concatenate(line_meals)
+        quantities = np.where(rng.random(len(line_orders)) < 0.85, 1, 2)
+
+        totals = np.bincount(line_orders, weights=prices[line_meals] * quantities, minlength=size)
+        np.add.at(points, users, (totals * 0.05).astype(np.int64))
+
+        timestamps = _timestamps(created[start:start + size])
+        _insert_columns(Order, {
+            'id': order_ids.tolist(),
+            'user_id': users.tolist(),
+            'items': ['[]'] * size,
+            'total': totals.tolist(),
+            'status': ['Completed'] * size,
+            'pickup_time': clock[minutes[start:start + size]].tolist(),
+            'payment_method': ['UPI'] * size,
+            'created_at': timestamps,
+            'updated_at': timestamps
+        })
+        _insert_columns(OrderItem, {
+            'order_id': order_ids[line_orders].tolist(),
+            'meal_id': meal_ids[line_meals].tolist(),
+            'name': names[line_meals].tolist(),
+            'qty': quantities.tolist(),
+            'unit_price': prices[line_meals].tolist()
+        })
+        print(f"   {start + size}/{count} orders", end='\r')
+    print()
+    return points
+
+def seed_loyalty(points, user_ids):
+    """Balances equal to the points earned, opened in the ledger so reconcile agrees"""
+    earned = points[user_ids]
+    db.session.execute(
+        User.__table__.update().where(User.__table__.c.id == bindparam('uid')).values(loyalty_points=bindparam('points')),
+        [{'uid': int(uid), 'points': int(p)} for uid, p in zip(user_ids, earned) if p]
+    )
+    _insert(LoyaltyTransaction, [
+        {'user_id': int(uid), 'delta': int(p), 'reason': 'opening_balance', 'created_at': datetime.utcnow()}
+        for uid, p in zip(user_ids, earned) if p
+    ])
+
+def seed_database(users=0, orders=0, days=120, seed=42, batch_size=50000, clear=True):
+    """Seed inside the current app context and commit once"""
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    if clear:
+        # Clear existing data; users and their history only when generating new ones
+        print("🗑️  Clearing existing data...")
+        tables = [Offer, Meal]
+        if users:
+            tables = [UserRecommendation, RecommendationRun, LoyaltyTransaction, IdempotencyKey,
+                      OrderEvent, OrderItem, Order, PickupSlot, User] + tables
+        for model in tables:
+            db.session.execute(delete(model))
+
+    print("🍽️  Seeding meals and offers...")
+    seed_menu()
+
+    if users:
+        print(f"👥 Seeding {users} users...")
+        user_ids = seed_users(rng, users, batch_size)
+        if orders:
+            print(f"🧾 Seeding {orders} orders...")
+            points = seed_orders(rng, user_ids, orders, days, batch_size)
+            seed_loyalty(points, user_ids)
+        print("📊 Building sales rollups...")
+        rollups.rebuild()
+
+    db.session.commit()
+    print("✅ Database seeded successfully!")
+    print(f"   - {len(MENU)} meals, {len(OFFERS)} offers, {users} users, {orders} orders "
+          f"in {time.perf_counter() - started:.1f}s")
+    if users:
+        print(f"   - every user's password is '{DEMO_PASSWORD}'")
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Seed the QuickPlate database')
+    parser.add_argument('--users', type=int, default=0, help='synthetic students to create')
+    parser.add_argument('--orders', type=int, default=0, help='synthetic orders to create (needs --users)')
+    parser.add_argument('--days', type=int, default=120, help='days of order history')
+    parser.add_argument('--seed', type=int, default=42, help='random seed; same seed, same data')
+    parser.add_argument('--batch-size', type=int, default=50000, help='rows per executemany')
+    parser.add_argument('--keep', action='store_true', help="append instead of clearing existing data")
+    args = parser.parse_args()
+    if args.orders and not args.users:
+        parser.error('--orders needs --users')
 
-def seed_database():
     app = create_app()
-    
     with app.app_context():
-        # Clear existing data
-        print("🗑️  Clearing existing data...")
-        Meal.query.delete()
-        
-        # Seed Meals
-        print("🍽️  Seeding meals...")
-        meals = [
-            # Breakfast
-            Meal(name='Masala Dosa', category='Breakfast', price=60, description='Crispy rice crepe served with coconut chutney and potato masala.', available=True, prep_time=15),
-            Meal(name='Idli Sambar', category='Breakfast', price=40, description='Steamed rice cakes served with sambar and chutney.', available=True, prep_time=10),
-            Meal(name='Poha', category='Breakfast', price=30, description='Flattened rice cooked with onions, peas, and spices.', available=True, prep_time=10),
-            Meal(name='Upma', category='Breakfast', price=35, description='Savory semolina porridge with vegetables.', available=True, prep_time=12),
-            
-            # Lunch
-            Meal(name='Veg Thali', category='Lunch', price=80, description='Complete meal with rice, roti, dal, sabzi, and curd.', available=True, prep_time=20),
-            Meal(name='Chole Bhature', category='Lunch', price=70, description='Spicy chickpea curry with fried bread.', available=True, prep_time=18),
-            Meal(name='Rajma Chawal', category='Lunch', price=65, description='Kidney bean curry with steamed rice.', available=True, prep_time=15),
-            Meal(name='Paneer Tikka', category='Lunch', price=90, description='Grilled cottage cheese marinated in spices.', available=True, prep_time=20),
-            
-            # Dinner
-            Meal(name='Dal Tadka', category='Dinner', price=55, description='Yellow lentils tempered with cumin and garlic.', available=True, prep_time=15),
-            Meal(name='Palak Paneer', category='Dinner', price=85, description='Cottage cheese in creamy spinach gravy.', available=True, prep_time=18),
-            Meal(name='Aloo Paratha', category='Dinner', price=50, description='Stuffed flatbread with spiced potato filling.', available=True, prep_time=15),
-            
-            # Snacks
-            Meal(name='Samosa', category='Snacks', price=20, description='Fried pastry with savory filling of spiced potatoes and peas.', available=True, prep_time=5),
-            Meal(name='Vada Pav', category='Snacks', price=25, description='Spiced potato fritter in a bun.', available=True, prep_time=8),
-            Meal(name='Pav Bhaji', category='Snacks', price=60, description='Spiced vegetable mash served with buttered bread.', available=True, prep_time=15),
-            Meal(name='Coffee', category='Snacks', price=15, description='Hot filter coffee.', available=True, prep_time=5),
-            Meal(name='Tea', category='Snacks', price=10, description='Hot masala chai.', available=True, prep_time=5),
-        ]
-        
-        db.session.bulk_save_objects(meals)
-        
-        db.session.commit()
-        print("✅ Database seeded successfully!")
-        print(f"   - {len(meals)} meals added")
+        seed_database(args.users, args.orders, args.days, args.seed, args.batch_size, clear=not args.keep)
 
 if __name__ == '__main__':
-    seed_database()
-if __name__ == '__main__':
-    seed_database()
+    main()
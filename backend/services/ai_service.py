@@ -1,24 +1,38 @@
-import google.generativeai as genai
 from config import Config
+from services.circuit_breaker import CircuitBreaker, CircuitOpen
+from services.chat_cache import ChatCache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from collections import deque
+import threading
+import time
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+class AIBusy(Exception):
+    """All AI call slots are taken; use the fallback instead of queueing"""
+
 class AIService:
-    def __init__(self):
-        # Configure Gemini with API key
-        api_key = Config.GEMINI_API_KEY or os.getenv('GEMINI_API_KEY')
-        if not api_key or api_key.startswith('AIzaSyDemoKey'):
-            print("⚠️  WARNING: Gemini API key not configured properly")
-            self.model = None
-        else:
-            try:
-                genai.configure(api_key=api_key)
-                # Try gemini-1.5-flash-latest first, fallback to gemini-pro
-                self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
-                print("✅ Gemini AI initialized successfully")
-            except Exception as e:
-                print(f"⚠️  Gemini initialization error: {e}")
-                self.model = None
+    def __init__(self, model=None):
+        # Injected model (e.g. a local fake for testing); otherwise Gemini is loaded on first use
+        self._model = model
+        self._model_loaded = model is not None
+        self._model_lock = threading.Lock()
+        
+        # Every Gemini call runs on a bounded pool with a deadline, behind a circuit breaker
+        self.timeout = Config.AI_TIMEOUT_SECONDS
+        self._slots = threading.BoundedSemaphore(Config.AI_MAX_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=Config.AI_MAX_CONCURRENCY, thread_name_prefix='gemini')
+        self.breaker = CircuitBreaker(Config.AI_BREAKER_FAILURES, Config.AI_BREAKER_COOLDOWN)
+        self._metrics_lock = threading.Lock()
+        self._counters = {
+            'calls': 0, 'successes': 0, 'failures': 0,
+            'timeouts': 0, 'rejected': 0, 'shortCircuited': 0
+        }
+        self._latencies = deque(maxlen=500)  # seconds, successful calls only
+        self.chat_cache = ChatCache(Config.AI_CHAT_CACHE_SIZE, Config.AI_CHAT_CACHE_TTL)
         
         self.chat_system_prompt = """You are QuickPlate AI Assistant, a helpful chatbot for a campus food ordering app.
 
@@ -39,6 +53,39 @@ Answer questions about:
 
 Be friendly, concise, and helpful. If you don't know something, suggest contacting support at support@quickplate.com."""
 
+    @property
+    def model(self):
+        """
+        The Gemini model, or None without a usable API key. google.generativeai
+        (protobuf, grpc, ...) is only imported here, on the first AI call, so
+        workers that never serve one never pay for it.
+        """
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    self._model = self._load_model()
+                    self._model_loaded = True
+        return self._model
+    
+    def _load_model(self):
+        # Configure Gemini with API key
+        api_key = Config.GEMINI_API_KEY or os.getenv('GEMINI_API_KEY')
+        if not api_key or api_key.startswith('AIzaSyDemoKey'):
+            print("⚠️  WARNING: Gemini API key not configured properly")
+            return None
+        
+        try:
+            import google.generativeai as genai
+            # REST transport: plain sockets cooperate with gevent workers, gRPC does not
+            genai.configure(api_key=api_key, transport='rest')
+            # Try gemini-1.5-flash-latest first, fallback to gemini-pro
+            model = genai.GenerativeModel('gemini-1.5-flash-latest')
+            print("✅ Gemini AI initialized successfully")
+            return model
+        except Exception as e:
+            print(f"⚠️  Gemini initialization error: {e}")
+            return None
+    
     def chat(self, user_message, conversation_history=None):
         """
         Handle chatbot conversation
@@ -47,6 +94,16 @@ Be friendly, concise, and helpful. If you don't know something, suggest contacti
         if not self.model:
             return self._fallback_chat(user_message)
         
+        # Answers only depend on the question when there is no conversation context
+        cache_key = None
+        if conversation_history:
+            self.chat_cache.bypass()
+        else:
+            cache_key = self.chat_cache.key(user_message, self.chat_system_prompt)
+            cached = self.chat_cache.get(cache_key)
+            if cached is not None:
+                return {'success': True, 'message': cached}
+        
         try:
             # Build conversation context
             messages = [self.chat_system_prompt]
@@ -61,14 +118,18 @@ Be friendly, concise, and helpful. If you don't know something, suggest contacti
             messages.append(f"User: {user_message}")
             
             # Generate response
-            response = self.model.generate_content("\n".join(messages))
+            text = self._generate("\n".join(messages))
+            if cache_key:
+                self.chat_cache.put(cache_key, text)
             
             return {
                 'success': True,
-                'message': response.text
+                'message': text
             }
+        except (CircuitOpen, AIBusy, FuturesTimeout):
+            return self._fallback_chat(user_message)
         except Exception as e:
-            print(f"AI Error: {str(e)}")
+            logger.warning("AI chat error: %s", e)
             # Use fallback on error
             return self._fallback_chat(user_message)
     
@@ -124,57 +185,116 @@ Be friendly, concise, and helpful. If you don't know something, suggest contacti
             'message': "Hi! I'm QuickPlate Assistant. 👋\n\nI can help you with:\n- Menu and vegetarian options\n- Ingredients and preparation time\n- Loyalty points program\n- Pickup location and timing\n- Payment methods\n\nWhat would you like to know?"
         }
     
-    def get_recommendations(self, user_orders, current_time=None):
+    def rerank_recommendations(self, candidates, user_orders):
         """
-        Generate personalized meal recommendations based on order history
+        Let Gemini reorder locally scored candidates using the user's recent
+        orders. Only candidate names are accepted back; on any failure the
+        local order stands.
         """
-        try:
-            # Prepare order history summary
-            if not user_orders:
-                prompt = """Suggest 3 popular meals from QuickPlate menu for a new user. 
-                Consider it's currently daytime. Return as JSON array with format:
-                [{"name": "Meal Name", "reason": "Why recommended", "category": "Breakfast/Lunch/Dinner/Snacks"}]"""
-            else:
-                order_summary = self._summarize_orders(user_orders)
-                prompt = f"""Based on this user's order history:
-{order_summary}
+        if not self.model or not candidates:
+            return candidates
+        
+        names = [candidate['name'] for candidate in candidates]
+        prompt = f"""Based on this user's order history:
+{self._summarize_orders(user_orders) or '- No orders yet'}
 
-Suggest 3 personalized meal recommendations. Consider:
-- Their favorite items
-- Time of day patterns
-- Variety (don't repeat same items)
+Rank these QuickPlate meals from most to least suitable for them right now:
+{json.dumps(names)}
 
-Return as JSON array with format:
-[{{"name": "Meal Name", "reason": "Why recommended", "category": "Breakfast/Lunch/Dinner/Snacks"}}]"""
-            
-            response = self.model.generate_content(prompt)
-            
-            # Parse JSON response
-            recommendations = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
-            
-            return {
-                'success': True,
-                'recommendations': recommendations
-            }
-        except Exception as e:
-            # Fallback recommendations
-            return {
-                'success': True,
-                'recommendations': [
-                    {'name': 'Masala Dosa', 'reason': 'Popular breakfast choice', 'category': 'Breakfast'},
-                    {'name': 'Veg Thali', 'reason': 'Complete meal option', 'category': 'Lunch'},
-                    {'name': 'Coffee', 'reason': 'Perfect pick-me-up', 'category': 'Snacks'}
-                ]
+Return only a JSON array of the same meal names, best first."""
+        
+        try:
+            text = self._generate(prompt)
+            ranked = json.loads(text.strip().replace('```json', '').replace('```', ''))
+        except Exception:
+            return candidates
+        
+        by_name = {candidate['name']: candidate for candidate in candidates}
+        reordered = [by_name.pop(name) for name in ranked if isinstance(name, str) and name in by_name]
+        return reordered + [candidate for candidate in candidates if candidate['name'] in by_name]
+    
+    def _generate(self, prompt):
+        """
+        model.generate_content with a concurrency cap, a per-call deadline and
+        the circuit breaker. Raises AIBusy, CircuitOpen, FuturesTimeout or the
+        model's own error; callers fall back on any of them.
+        """
+        self._count('calls')
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise AIBusy()
+        
+        try:
+            self.breaker.before_call()
+            future = self._executor.submit(self.model.generate_content, prompt)
+        except CircuitOpen:
+            self._slots.release()
+            self._count('shortCircuited')
+            raise
+        except Exception:
+            self._slots.release()
+            raise
+        
+        # A timed-out call keeps its slot until the thread really finishes
+        future.add_done_callback(lambda _: self._slots.release())
+        
+        started = time.perf_counter()
+        try:
+            text = future.result(timeout=self.timeout).text
+        except FuturesTimeout:
+            self._count('timeouts')
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self._count('failures')
+            self.breaker.record_failure()
+            raise
+        
+        self.breaker.record_success()
+        self._count('successes')
+        with self._metrics_lock:
+            self._latencies.append(time.perf_counter() - started)
+        return text
+    
+    def _count(self, name):
+        with self._metrics_lock:
+            self._counters[name] += 1
+    
+    def stats(self):
+        """Latency, timeout and circuit breaker metrics for Gemini calls"""
+        with self._metrics_lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+        
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+        
+        return {
+            # Reporting must not load the model
+            'modelLoaded': self._model_loaded,
+            'modelConfigured': self._model is not None if self._model_loaded else None,
+            'breaker': {
+                'state': self.breaker.state,
+                'timesOpened': self.breaker.times_opened
+            },
+            **counters,
+            'chatCache': self.chat_cache.stats(),
+            'latencyMs': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'max': round(latencies[-1] * 1000, 1) if latencies else None
             }
+        }
     
     def _summarize_orders(self, orders):
         """Helper to summarize order history"""
         summary = []
         for order in orders[-10:]:  # Last 10 orders
-            items = json.loads(order.items) if isinstance(order.items, str) else order.items
-            item_names = [item.get('name', 'Unknown') for item in items]
+            item_names = [item.name for item in order.items]
             summary.append(f"- Ordered: {', '.join(item_names)} at {order.created_at.strftime('%A %I:%M %p')}")
         return "\n".join(summary)
 
-# Singleton instance
+# Singleton instance (cheap: the model is loaded on first use)
 ai_service = AIService()
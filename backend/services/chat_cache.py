@@ -0,0 +1,84 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+STOPWORDS = frozenset("""
+a an the is are was were be been am do does did can could will would should
+i me my we our you your it its this that these those there here
+of to in on at for with about from by and or so please hi hello hey
+what whats how hows tell know
+""".split())
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_message(message):
+    """'Is the Thali veg?' and 'thali veg' -> 'thali veg'"""
+    words = _PUNCTUATION.sub(' ', message.lower()).split()
+    kept = [word for word in words if word not in STOPWORDS]
+    # A message made only of stopwords still needs a key of its own
+    return ' '.join(kept or words)
+
+class ChatCache:
+    """
+    LRU cache with a TTL for history-free chat answers. Keys are the
+    normalized question plus a hash of the system prompt, so editing the
+    prompt never serves answers written for the old one.
+    """
+
+    def __init__(self, max_size=512, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, answer)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def key(self, message, system_prompt):
+        prompt_hash = hashlib.sha1(system_prompt.encode('utf-8')).hexdigest()[:12]
+        return f'{prompt_hash}:{normalize_message(message)}'
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, answer):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bypass(self):
+        """Count a request that skipped the cache because it carried history"""
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'evictions': self.evictions,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                # Each hit is one generate_content call (and its quota) not made
+                'modelCallsSaved': self.hits
+            }
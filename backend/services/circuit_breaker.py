@@ -0,0 +1,62 @@
+import threading
+import time
+
+class CircuitOpen(Exception):
+    """The breaker is open; skip the call and use the fallback"""
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After `failure_threshold` consecutive
+    failures it opens for `cooldown` seconds, then lets a single trial call
+    through (half-open): success closes it, failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, cooldown=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go ahead"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                raise CircuitOpen()
+            if state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpen()
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
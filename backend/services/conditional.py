@@ -0,0 +1,28 @@
+import hashlib
+from flask import request, current_app
+
+def make_etag(*parts):
+    """Strong ETag value from a content version (row timestamps, counts, ...)"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def body_etag(body):
+    """Strong ETag value for an already serialized body"""
+    return hashlib.sha1(body).hexdigest()
+
+def not_modified(etag):
+    """
+    Return a bodiless 304 response if the client's If-None-Match already
+    holds this ETag, otherwise None so the handler builds the full response.
+    """
+    if not request.if_none_match.contains(etag):
+        return None
+    
+    response = current_app.response_class(status=304)
+    return tag(response, etag)
+
+def tag(response, etag):
+    """Attach the ETag and ask clients to revalidate on every use"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
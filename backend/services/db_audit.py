@@ -0,0 +1,198 @@
+"""
+Query plan audit for the API.
+Drives every route through the test client against a scratch database,
+captures the SQL each one issues, and EXPLAINs it to flag full table scans.
+A request that doesn't succeed (2xx/304) covers no real query, and a route
+missing from AUDIT_REQUESTS is never audited; both fail the audit too.
+"""
+
+import os
+import re
+import tempfile
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from config import Config
+from models import db, User, Meal, Offer
+
+# (method, url, json body[, headers]), sent as user 1. '{nextCursor}' is filled from the previous response.
+# Event streams are read up to their first event, then closed.
+AUDIT_REQUESTS = [
+    ('GET', '/health', None),
+    ('GET', '/metrics', None, {'X-Admin-Key': 'audit-admin'}),
+    ('POST', '/api/auth/login', {'sapId': 'audit-1', 'password': 'audit-pass'}),
+    ('POST', '/api/auth/signup', {'sapId': 'audit-2', 'name': 'Audit Two', 'password': 'audit-pass'}),
+    ('POST', '/api/auth/change-password', {'userId': 1, 'oldPassword': 'audit-pass', 'newPassword': 'audit-pass'}),
+    ('GET', '/api/auth/users/1', None),
+    ('PUT', '/api/auth/users/1', {'phone': '0000000000'}),
+    ('GET', '/api/meals', None),
+    ('GET', '/api/meals?category=Lunch', None),
+    ('GET', '/api/meals/1', None),
+    ('GET', '/api/meals/cache-stats', None),
+    ('POST', '/api/orders', {'userId': 1, 'items': [{'mealId': '1', 'name': 'Audit Meal', 'quantity': 2, 'price': 50}], 'total': 100, 'pickupTime': '12:30 PM'}),
+    ('POST', '/api/orders', {'userId': 1, 'items': [{'mealId': '2', 'name': 'Audit Snack', 'quantity': 1, 'price': 20}], 'total': 20, 'pointsUsed': 1, 'pickupTime': '12:30 PM'}),
+    ('POST', '/api/orders', {'userId': 1, 'items': [{'mealId': '1', 'quantity': 1}], 'pickupTime': '12:45 PM'}, {'Idempotency-Key': 'audit-order'}),
+    ('POST', '/api/orders', {'userId': 1, 'items': [{'mealId': '1', 'quantity': 1}], 'pickupTime': '12:45 PM'}, {'Idempotency-Key': 'audit-order'}),
+    # Exactly what app/checkout.tsx (via AuthContext.placeOrder) sends: total is the item total, not the bill
+    ('POST', '/api/orders', {'userId': 1, 'items': [{'mealId': '2', 'name': 'Audit Snack', 'quantity': 3, 'price': 20},
+                                                    {'mealId': '1', 'name': 'Audit Meal', 'quantity': 1, 'price': 50}],
+                             'total': 110, 'pickupTime': '1:00 PM', 'paymentMethod': 'UPI', 'pointsUsed': 60},
+     {'Idempotency-Key': 'audit-checkout'}),
+    ('GET', '/api/orders/slots', None),
+    ('GET', '/api/orders/user/1?limit=1', None),
+    ('GET', '/api/orders/user/1?limit=1&cursor={nextCursor}', None),
+    ('PUT', '/api/orders/1/status', {'status': 'Preparing'}, {'X-Admin-Key': 'audit-admin'}),
+    ('GET', '/api/orders/1/events', None),
+    ('GET', '/api/orders/user/1/events', None, {'Last-Event-ID': '1'}),
+    ('GET', '/api/kitchen/queue', None, {'X-Admin-Key': 'audit-admin'}),
+    ('GET', '/api/kitchen/orders/1', None),
+    ('GET', '/api/loyalty/1', None),
+    ('GET', '/api/loyalty/1/transactions', None),
+    ('GET', '/api/loyalty/offers', None),
+    ('POST', '/api/loyalty/redeem', {'userId': 1, 'offerId': 1}),
+    ('GET', '/api/ai/recommendations/1', None),
+    ('POST', '/api/ai/chat', {'message': 'What is on the menu?'}),
+    ('GET', '/api/ai/stats', None),
+    ('GET', '/api/admin/stats?bucket=day', None, {'X-Admin-Key': 'audit-admin'}),
+    ('GET', '/api/admin/forecast', None, {'X-Admin-Key': 'audit-admin'}),
+]
+
+# Endpoints deliberately left out of AUDIT_REQUESTS, with the reason
+UNAUDITED_ENDPOINTS = {
+    'static': 'files only, no SQL',
+}
+
+# Tables that are deliberately read whole, with the reason
+ALLOWED_SCANS = {
+    'offers': 'a handful of rows; the offers ETag is a whole-table count/max',
+    'schema_migrations': 'startup only',
+}
+
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+def _seed():
+    db.session.add(User(sap_id='audit-1', name='Audit One', password_hash=generate_password_hash('audit-pass'), loyalty_points=500))
+    db.session.add_all([
+        Meal(name='Audit Meal', category='Lunch', price=50, available=True, prep_time=10),
+        Meal(name='Audit Snack', category='Snacks', price=20, available=True, prep_time=5),
+    ])
+    db.session.add(Offer(title='Audit Offer', points_required=10, discount_amount=10, active=True))
+    db.session.commit()
+
+def _capture(engine):
+    """Collect distinct (statement, parameters) pairs run on engine"""
+    statements = {}
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if not executemany and verb in ('SELECT', 'UPDATE', 'DELETE', 'WITH'):
+            statements.setdefault(statement, parameters)
+    
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def _explain(connection, statement, parameters):
+    """Return (plan lines, tables read with a full scan)"""
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        lines = [row[-1] for row in rows]
+        pattern = SQLITE_SCAN
+    else:
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).all()
+        lines = [row[0] for row in rows]
+        pattern = POSTGRES_SCAN
+    
+    scanned = []
+    for line in lines:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in db.metadata.tables:
+            scanned.append(match.group(1))
+    return lines, scanned
+
+def _send(client, method, url, body, headers):
+    """(status, JSON body or {}) of one audit request"""
+    response = client.open(url, method=method, json=body, headers=headers, buffered=False)
+    try:
+        if response.mimetype == 'text/event-stream':
+            # The route's queries ran before streaming; start the body so closing it unsubscribes
+            next(iter(response.response), None)
+            return response.status_code, {}
+        return response.status_code, response.get_json(silent=True) or {}
+    finally:
+        response.close()
+
+def _unaudited_routes(app):
+    """'METHOD /rule' for every route no audit request reaches"""
+    adapter = app.url_map.bind('localhost')
+    covered = set()
+    for method, url, *_ in AUDIT_REQUESTS:
+        path = url.split('?', 1)[0].replace('{nextCursor}', '')
+        try:
+            endpoint, _ = adapter.match(path, method=method)
+        except Exception:
+            continue
+        covered.add((endpoint, method))
+    
+    return [
+        f'{method} {rule.rule}'
+        for rule in app.url_map.iter_rules() if rule.endpoint not in UNAUDITED_ENDPOINTS
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}) if (rule.endpoint, method) not in covered
+    ]
+
+def run_audit(database_url=None):
+    """
+    Audit every route's queries. Returns (results, failures): a list of
+    {'statement', 'plan', 'scans'} dicts, one per distinct statement, and a
+    list of problems with the requests themselves (failed requests, routes
+    with no audit request).
+    """
+    from app import create_app
+    from services.menu_cache import menu_cache
+    from services.session_tokens import issue_token
+    
+    tmp = None
+    if not database_url:
+        tmp = tempfile.TemporaryDirectory()
+        database_url = 'sqlite:///' + os.path.join(tmp.name, 'audit.db')
+    
+    class AuditConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        SECRET_KEY = 'audit-secret'
+        ADMIN_API_KEY = 'audit-admin'
+    
+    try:
+        app = create_app(AuditConfig)
+        client = app.test_client()
+        with app.app_context():
+            _seed()
+            menu_cache.bump()
+            headers = {'Authorization': f'Bearer {issue_token(1)}'}
+            statements, stop = _capture(db.engine)
+            
+            failures = [f'{route}: no audit request' for route in _unaudited_routes(app)]
+            last = {}
+            try:
+                for method, url, body, *extra in AUDIT_REQUESTS:
+                    if '{nextCursor}' in url:
+                        url = url.replace('{nextCursor}', last.get('nextCursor') or '')
+                    status, last = _send(client, method, url, body, {**headers, **(extra[0] if extra else {})})
+                    if not (200 <= status < 300 or status == 304):
+                        failures.append(f"{method} {url}: {status} {last.get('error', '')}".rstrip())
+            finally:
+                stop()
+            
+            results = []
+            with db.engine.connect() as connection:
+                for statement, parameters in statements.items():
+                    plan, scans = _explain(connection, statement, parameters)
+                    results.append({
+                        'statement': ' '.join(statement.split()),
+                        'plan': plan,
+                        'scans': [table for table in scans if table not in ALLOWED_SCANS]
+                    })
+            db.session.remove()
+            db.engine.dispose()
+        return results, failures
+    finally:
+        if tmp:
+            tmp.cleanup()
@@ -0,0 +1,91 @@
+"""
+Idempotency-Key handling for POST /api/orders.
+The first request with a key inserts an idempotency_keys row in the same
+transaction as the order, so the row and the order commit (or roll back)
+together. A retry finds the row and gets the stored response back without
+writing anything. Concurrent requests with the same key race on the
+(user_id, key) unique constraint: the loser's insert waits for the winner
+to commit, fails, and the loser replays the winner's response.
+Only successful responses are stored; a request that fails leaves the key
+free to be retried. Keys expire after IDEMPOTENCY_KEY_TTL seconds.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from flask import current_app, jsonify
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+class KeyReused(Exception):
+    """The key was already used for a request with a different body"""
+
+def fingerprint(data):
+    """sha256 of the request body, independent of key order"""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _expires_before():
+    return datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+
+def find(user_id, key):
+    """The stored, unexpired response for this user's key, else None"""
+    return db.session.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at >= _expires_before()
+        )
+    ).scalar_one_or_none()
+
+def replay(record, request_hash):
+    """Flask response for a stored record; raises KeyReused on a different body"""
+    if record.request_hash != request_hash:
+        raise KeyReused()
+    response = jsonify(json.loads(record.response))
+    response.status_code = record.status_code
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def claim(user_id, key, request_hash):
+    """
+    Insert the key row (without committing) before any other write of the
+    request. Returns the row to fill in with save(), or None if another
+    request holds the key; the session is rolled back in that case.
+    """
+    # An expired row for the same key would block the insert
+    db.session.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.created_at < _expires_before()
+    ))
+    record = IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash, status_code=0, response='')
+    db.session.add(record)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return record
+
+def save(record, body, status_code):
+    """Store the response on a claimed row; commits with the caller's transaction"""
+    record.status_code = status_code
+    record.response = json.dumps(body, default=str)
+
+def prune(batch_size=1000):
+    """Delete expired keys in batches, one short transaction each; returns the count"""
+    cutoff = _expires_before()
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(IdempotencyKey.id).where(IdempotencyKey.created_at < cutoff).limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        deleted += db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids))).rowcount
+        db.session.commit()
@@ -0,0 +1,289 @@
+"""
+Kitchen scheduler.
+Open order lines are grouped into batches of the same meal whose pickup
+times fall in the same window (ten Masala Dosas cooked together), kept in
+a list sorted by due time. Batches are assigned, earliest due first, to
+the configured number of stations (just in time, or as soon as a station
+frees up, and never before the batch was queued). Next to each batch the
+plan keeps the stations' state after it, so a change only replans from
+its own position: adding, moving or finishing a batch costs a bisect,
+a list insert or delete (O(n), shifting the pointers after it) and
+replanning the batches due after it, O(n) as well, n being the open
+batches; reads replan nothing.
+
+The queue lives in process memory and is fed by create_order and
+update_order_status. Every KITCHEN_SYNC_SECONDS it applies the orders
+other workers changed since the last sync (an updated_at range scan,
+overlapping by KITCHEN_SYNC_OVERLAP_SECONDS for transactions that commit
+late; applying a change twice is a no-op).
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from models import db, Order
+from services.price_index import price_index
+
+OPEN_STATUSES = ('Placed', 'Preparing')
+PICKUP_FORMATS = ('%I:%M %p', '%I:%M%p', '%H:%M')
+
+def parse_clock(text):
+    """datetime.time for a free-text pickup time ('12:30 PM', '12:30'), else None"""
+    for fmt in PICKUP_FORMATS:
+        try:
+            return datetime.strptime((text or '').strip().upper(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+def parse_pickup_time(text, created_at, prep_time):
+    """
+    Epoch seconds for a free-text pickup time ('12:30 PM', '12:30') on the
+    day the order was placed. Unparseable or missing times mean 'as soon as
+    possible', i.e. placed time plus prep time.
+    """
+    placed = created_at.replace(tzinfo=timezone.utc).timestamp()
+    clock = parse_clock(text)
+    if clock is None:
+        return placed + prep_time * 60
+    # Pickup times are canteen wall-clock times
+    local_day = datetime.fromtimestamp(placed).date()
+    due = datetime.combine(local_day, clock).timestamp()
+    if due < placed - 3600:
+        due += 24 * 3600  # e.g. placed 23:50 for 00:10
+    return due
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+class Batch:
+    """One meal cooked together for several orders"""
+    __slots__ = ('meal_id', 'name', 'prep_time', 'due', 'queued_at', 'key', 'open_key', 'lines',
+                 'station', 'start', 'ready')
+
+    def __init__(self, meal_id, name, prep_time, due, queued_at, key, open_key):
+        self.meal_id = meal_id
+        self.name = name
+        self.prep_time = prep_time
+        self.due = due
+        self.queued_at = queued_at  # can't start cooking before it was ordered
+        self.key = key              # (due, seq): position in the plan
+        self.open_key = open_key
+        self.lines = {}  # order_id -> quantity
+        self.station = self.start = self.ready = None
+
+    @property
+    def quantity(self):
+        return sum(self.lines.values())
+
+class KitchenScheduler:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._seq = itertools.count()
+        self.stations = 4
+        self.batch_window = 10 * 60
+        self.max_batch = 10
+        self.default_prep_time = 10
+        self.sync_seconds = 5
+        self.sync_overlap = timedelta(seconds=30)
+        self._reset()
+
+    def init_app(self, app):
+        self.stations = app.config.get('KITCHEN_STATIONS', self.stations)
+        self.batch_window = app.config.get('KITCHEN_BATCH_WINDOW_MINUTES', 10) * 60
+        self.max_batch = app.config.get('KITCHEN_MAX_BATCH', self.max_batch)
+        self.default_prep_time = app.config.get('KITCHEN_DEFAULT_PREP_TIME', self.default_prep_time)
+        self.sync_seconds = app.config.get('KITCHEN_SYNC_SECONDS', self.sync_seconds)
+        self.sync_overlap = timedelta(seconds=app.config.get('KITCHEN_SYNC_OVERLAP_SECONDS', 30))
+
+    def _reset(self):
+        self._keys = []            # (due, seq) of every batch, sorted: the cooking order
+        self._batches = []         # batches, parallel to _keys
+        self._after = []           # station free times, sorted, after planning each batch
+        self._dirty = 0            # first position whose plan is out of date
+        self._open = {}            # (meal_id or name, window) -> batch still accepting items
+        self._by_order = {}        # order_id -> [batch, ...]
+        self._order_due = {}       # order_id -> requested pickup (epoch seconds)
+        self._synced_at = None     # monotonic time of the last sync; None until the first load
+        self._since = None         # updated_at watermark of the last sync
+
+    # -- feeding the queue --------------------------------------------------
+
+    def add_order(self, order, prep_times=None):
+        """Queue every line of an open order: a bisect per new or moved batch"""
+        if order.id in self._by_order:
+            return
+        if prep_times is None:
+            prep_times = self._prep_times(item.meal_id for item in order.items)
+        with self._lock:
+            if order.id in self._by_order:
+                return
+            lines = [(item, prep_times.get(item.meal_id) or self.default_prep_time) for item in order.items]
+            longest = max((prep for _, prep in lines), default=self.default_prep_time)
+            due = parse_pickup_time(order.pickup_time, order.created_at, longest)
+            self._order_due[order.id] = due
+            self._by_order[order.id] = []
+
+            for item, prep_time in lines:
+                self._add_line(order.id, item, prep_time, due)
+
+    def _add_line(self, order_id, item, prep_time, due):
+        open_key = (item.meal_id or item.name, int(due // self.batch_window))
+        remaining = item.qty
+        while remaining > 0:
+            batch = self._open.get(open_key)
+            if batch is None or batch.quantity >= self.max_batch:
+                batch = Batch(item.meal_id, item.name, prep_time, due, time.time(), (due, next(self._seq)), open_key)
+                self._open[open_key] = batch
+                self._insert(batch)
+            elif due < batch.due:
+                # Earlier pickup joined the batch: move it up the plan
+                self._remove(batch)
+                batch.due, batch.key = due, (due, next(self._seq))
+                self._insert(batch)
+
+            take = min(remaining, self.max_batch - batch.quantity)
+            batch.lines[order_id] = batch.lines.get(order_id, 0) + take
+            if batch not in self._by_order[order_id]:
+                self._by_order[order_id].append(batch)
+            remaining -= take
+
+    def _insert(self, batch):
+        position = bisect.bisect_left(self._keys, batch.key)
+        self._keys.insert(position, batch.key)
+        self._batches.insert(position, batch)
+        self._after.insert(position, None)
+        self._dirty = min(self._dirty, position)
+
+    def _remove(self, batch):
+        position = bisect.bisect_left(self._keys, batch.key)
+        del self._keys[position], self._batches[position], self._after[position]
+        self._dirty = min(self._dirty, position)
+
+    def remove_order(self, order_id):
+        """Drop an order that is ready or collected"""
+        with self._lock:
+            for batch in self._by_order.pop(order_id, []):
+                batch.lines.pop(order_id, None)
+                if not batch.lines:
+                    self._remove(batch)
+                    if self._open.get(batch.open_key) is batch:
+                        del self._open[batch.open_key]
+            self._order_due.pop(order_id, None)
+
+    def order_status_changed(self, order):
+        if order.status in OPEN_STATUSES:
+            self.add_order(order)
+        else:
+            self.remove_order(order.id)
+
+    # -- reading the schedule -----------------------------------------------
+
+    def queue(self):
+        """Batches in cooking order with station, start and projected ready times"""
+        self._sync()
+        with self._lock:
+            self._replan()
+            return [
+                {
+                    'mealId': str(batch.meal_id) if batch.meal_id is not None else None,
+                    'name': batch.name,
+                    'quantity': batch.quantity,
+                    'orders': [f'ORD-{order_id}' for order_id in batch.lines],
+                    'station': batch.station,
+                    'due': _iso(batch.due),
+                    'start': _iso(batch.start),
+                    'ready': _iso(batch.ready),
+                    'late': batch.ready > batch.due + 60
+                }
+                for batch in self._batches
+            ]
+
+    def projection(self, order_id):
+        """Requested pickup and projected ready time for an order (None once it leaves the queue)"""
+        self._sync()
+        with self._lock:
+            self._replan()
+            due = self._order_due.get(order_id)
+            ready = max((batch.ready for batch in self._by_order.get(order_id, ())), default=None)
+        return {
+            'requestedPickup': _iso(due) if due else None,
+            'projectedReadyTime': _iso(ready) if ready else None
+        }
+
+    def _replan(self):
+        """Plan the batches from the first changed position on; the ones before it keep their slots"""
+        if self._dirty >= len(self._batches):
+            return
+        position = self._dirty
+        stations = list(self._after[position - 1]) if position else [
+            (0.0, number) for number in range(1, self.stations + 1)
+        ]
+        for index in range(position, len(self._batches)):
+            batch = self._batches[index]
+            free_at, number = heapq.heappop(stations)
+            # Start just in time for pickup, or as soon as the station frees up
+            batch.start = max(free_at, batch.due - batch.prep_time * 60, batch.queued_at)
+            batch.ready = batch.start + batch.prep_time * 60
+            batch.station = number
+            heapq.heappush(stations, (batch.ready, number))
+            self._after[index] = tuple(stations)
+        self._dirty = len(self._batches)
+
+    # -- keeping in step with the database ----------------------------------
+
+    def _prep_times(self, meal_ids):
+        """meal_id -> prep_time, from the shared price index (at most one batched query)"""
+        return {
+            meal_id: entry.prep_time if entry else None
+            for meal_id, entry in price_index.lookup(meal_ids).items()
+        }
+
+    def _sync(self):
+        if self._synced_at is None:
+            self.rebuild()
+        elif time.monotonic() - self._synced_at >= self.sync_seconds:
+            self.apply_changes()
+
+    def rebuild(self):
+        """Reload every open order from the database (first use in a process)"""
+        since = db.session.execute(select(func.max(Order.updated_at))).scalar()
+        orders = Order.query.filter(Order.status.in_(OPEN_STATUSES)).order_by(Order.id).all()
+        prep_times = self._prep_times(item.meal_id for order in orders for item in order.items)
+        with self._lock:
+            self._reset()
+            for order in orders:
+                self.add_order(order, prep_times)
+            self._since = since
+            self._synced_at = time.monotonic()
+
+    def apply_changes(self):
+        """Apply orders changed since the last sync: new ones join, finished ones leave"""
+        self._synced_at = time.monotonic()
+        since = self._since
+        query = select(Order.id, Order.status, Order.updated_at).order_by(Order.updated_at)
+        if since is not None:
+            query = query.where(Order.updated_at > since - self.sync_overlap)
+        changes = db.session.execute(query).all()
+        if not changes:
+            return
+
+        # Only orders this process doesn't know about yet need their lines loaded
+        new_ids = [row.id for row in changes if row.status in OPEN_STATUSES and row.id not in self._by_order]
+        orders = Order.query.filter(Order.id.in_(new_ids)).all() if new_ids else []
+        prep_times = self._prep_times(item.meal_id for order in orders for item in order.items)
+        with self._lock:
+            for order in orders:
+                if order.status in OPEN_STATUSES:
+                    self.add_order(order, prep_times)
+            for row in changes:
+                if row.status not in OPEN_STATUSES:
+                    self.remove_order(row.id)
+            self._since = max(since, changes[-1].updated_at) if since else changes[-1].updated_at
+
+# Singleton instance
+kitchen = KitchenScheduler()
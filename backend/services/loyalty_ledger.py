@@ -0,0 +1,75 @@
+"""
+Loyalty point ledger.
+Every change is appended to loyalty_transactions, and the cached balance
+in users.loyalty_points is moved with a single conditional UPDATE, so
+concurrent orders and redemptions can neither double-spend nor lose an
+update, without locking anything beyond the one user row. Callers own the
+transaction: nothing here commits.
+"""
+
+from sqlalchemy import func, select, update
+from models import db, User, LoyaltyTransaction
+
+class InsufficientPoints(Exception):
+    """The balance is lower than the points being spent (or the user is gone)"""
+
+def _append(user_id, delta, reason, order_id=None, offer_id=None):
+    db.session.add(LoyaltyTransaction(
+        user_id=user_id,
+        delta=delta,
+        reason=reason,
+        order_id=order_id,
+        offer_id=offer_id
+    ))
+
+def debit(user_id, points, reason, order_id=None, offer_id=None):
+    """Spend points: UPDATE ... SET points = points - n WHERE id = :id AND points >= n"""
+    result = db.session.execute(
+        update(User)
+        .where(User.id == user_id, User.loyalty_points >= points)
+        .values(loyalty_points=User.loyalty_points - points)
+    )
+    if result.rowcount != 1:
+        raise InsufficientPoints()
+    _append(user_id, -points, reason, order_id, offer_id)
+
+def credit(user_id, points, reason, order_id=None, offer_id=None):
+    """Add points; returns False if the user row does not exist"""
+    result = db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(loyalty_points=User.loyalty_points + points)
+    )
+    if result.rowcount != 1:
+        return False
+    _append(user_id, points, reason, order_id, offer_id)
+    return True
+
+def balance(user_id):
+    """Cached balance, read inside the caller's transaction"""
+    return db.session.execute(select(User.loyalty_points).where(User.id == user_id)).scalar()
+
+def reconcile(fix=False):
+    """
+    Compare every cached balance with its ledger sum. Returns a list of
+    (user_id, cached, ledger) for mismatches; with fix=True the cached
+    balance is reset to the ledger sum (the ledger is the source of truth).
+    """
+    ledger = (
+        select(LoyaltyTransaction.user_id, func.sum(LoyaltyTransaction.delta).label('total'))
+        .group_by(LoyaltyTransaction.user_id)
+        .subquery()
+    )
+    ledger_total = func.coalesce(ledger.c.total, 0)
+    rows = db.session.execute(
+        select(User.id, func.coalesce(User.loyalty_points, 0), ledger_total)
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+        .where(func.coalesce(User.loyalty_points, 0) != ledger_total)
+    ).all()
+    
+    if fix:
+        for user_id, cached, total in rows:
+            db.session.execute(update(User).where(User.id == user_id).values(loyalty_points=total))
+        db.session.commit()
+    
+    return [tuple(row) for row in rows]
@@ -0,0 +1,132 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from models import db, Meal
+from services.conditional import body_etag
+
+class MenuCache:
+    """
+    In-process cache of the serialized menu, one JSON body per category.
+    Every insert, update or delete of a Meal bumps the version counter and
+    drops the cached bodies, so a hit never has to touch the database.
+    """
+    ALL = 'All'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bodies = None  # category -> (body bytes, etag)
+        self._built_at = 0.0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self.ttl = 60
+
+    def init_app(self, app):
+        self.enabled = app.config.get('MENU_CACHE_ENABLED', True)
+        self.ttl = app.config.get('MENU_CACHE_TTL', 60)
+
+        # Listen once per process, even if create_app() runs several times
+        if not event.contains(db.session, 'after_flush', _track_meal_changes):
+            event.listen(db.session, 'after_flush', _track_meal_changes)
+            event.listen(db.session, 'do_orm_execute', _track_bulk_meal_changes)
+            event.listen(db.session, 'after_commit', _bump_on_commit)
+            event.listen(db.session, 'after_rollback', _discard_on_rollback)
+
+    def bump(self):
+        """Invalidate every cached category"""
+        with self._lock:
+            self.version += 1
+            self._bodies = None
+
+    def get(self, category=None):
+        """Return the serialized `{success, meals}` body and its ETag for a category"""
+        key = category or self.ALL
+
+        if not self.enabled:
+            self.misses += 1
+            return self._uncached(key)
+
+        with self._lock:
+            bodies = self._bodies
+            if bodies is not None and time.monotonic() - self._built_at > self.ttl:
+                # Backstop for changes made by other processes (seed_db.py, other workers)
+                bodies = self._bodies = None
+            version = self.version
+
+        if bodies is not None:
+            self.hits += 1
+            return bodies.get(key, bodies[None])
+
+        self.misses += 1
+        bodies = self._serialize(self._load())
+        with self._lock:
+            # Only publish if nothing changed while we were reading
+            if self.version == version:
+                self._bodies = bodies
+                self._built_at = time.monotonic()
+        return bodies.get(key, bodies[None])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': round(self.hits / total, 4) if total else 0.0
+        }
+
+    def _load(self):
+        return Meal.query.filter_by(available=True).all()
+
+    def _uncached(self, category):
+        """Query and serialize on every call, as get_meals did before the cache"""
+        query = Meal.query.filter_by(available=True)
+        if category != self.ALL:
+            query = query.filter_by(category=category)
+        return self._entry([meal.to_dict() for meal in query.all()])
+
+    def _serialize(self, meals):
+        """Build the response body for 'All' plus every category in one pass"""
+        grouped = {self.ALL: []}
+        for meal in meals:
+            data = meal.to_dict()
+            grouped[self.ALL].append(data)
+            grouped.setdefault(meal.category, []).append(data)
+
+        bodies = {category: self._entry(items) for category, items in grouped.items()}
+        bodies[None] = self._entry([])  # unknown categories
+        return bodies
+
+    def _entry(self, meals):
+        body = (current_app.json.dumps({'success': True, 'meals': meals}) + '\n').encode('utf-8')
+        # Hash of the body rather than self.version, so ETags agree across workers
+        return body, body_etag(body)
+
+def _track_meal_changes(session, flush_context):
+    """Remember that this transaction touched the meals table"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Meal):
+            session.info['menu_changed'] = True
+            return
+
+def _track_bulk_meal_changes(orm_execute_state):
+    """Catch Meal.query.delete()/update() and bulk inserts, which skip the flush"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    for mapper in orm_execute_state.all_mappers:
+        if mapper.class_ is Meal:
+            orm_execute_state.session.info['menu_changed'] = True
+            return
+
+def _bump_on_commit(session):
+    if session.info.pop('menu_changed', False):
+        menu_cache.bump()
+
+def _discard_on_rollback(session):
+    session.info.pop('menu_changed', None)
+
+# Singleton instance
+menu_cache = MenuCache()
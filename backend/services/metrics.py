@@ -0,0 +1,173 @@
+"""
+Request and SQL instrumentation, exported at /metrics in the Prometheus
+text format.
+Every request records its latency in a per-endpoint histogram, plus the
+number of SQL statements it ran and the time spent in them (timed with
+the engine's before/after_cursor_execute events). A request that runs the
+same SELECT METRICS_N_PLUS_ONE_THRESHOLD times or more is logged as a
+likely N+1 and counted.
+
+Metrics live in process memory, so each gunicorn worker exports its own;
+scrape workers individually or sum them on the Prometheus side. The
+scraper sends X-Admin-Key, like the admin API.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from flask import Response, request
+from sqlalchemy import event
+from models import db
+from routes.admin import admin_required
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class RequestStats:
+    """SQL activity of the request in flight"""
+    __slots__ = ('started', 'queries', 'db_seconds', 'selects')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.selects = {}  # statement -> executions
+
+_current = ContextVar('request_stats', default=None)
+
+class Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.n_plus_one_threshold = 5
+        self._reset()
+
+    def _reset(self):
+        self._latency = {}      # (method, endpoint) -> Histogram
+        self._responses = {}    # (method, endpoint, status) -> count
+        self._queries = {}      # endpoint -> SQL statements run
+        self._db_seconds = {}   # endpoint -> seconds spent in SQL
+        self._n_plus_one = {}   # endpoint -> requests flagged
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.n_plus_one_threshold = app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(_start_request)
+        app.after_request(self._finish_request)
+        # Endpoint names, traffic and timings are not for the public: staff key, like the admin API
+        app.add_url_rule('/metrics', 'metrics', admin_required(self.export))
+
+    def _finish_request(self, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        _current.set(None)
+
+        elapsed = time.perf_counter() - stats.started
+        # Route template, so /api/orders/1 and /api/orders/2 share a series
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+        repeated = max(stats.selects.values(), default=0)
+
+        with self._lock:
+            histogram = self._latency.get((method, endpoint))
+            if histogram is None:
+                histogram = self._latency[(method, endpoint)] = Histogram()
+            histogram.observe(elapsed)
+            key = (method, endpoint, response.status_code)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            self._queries[endpoint] = self._queries.get(endpoint, 0) + stats.queries
+            self._db_seconds[endpoint] = self._db_seconds.get(endpoint, 0.0) + stats.db_seconds
+            if repeated >= self.n_plus_one_threshold:
+                self._n_plus_one[endpoint] = self._n_plus_one.get(endpoint, 0) + 1
+
+        if repeated >= self.n_plus_one_threshold:
+            statement = max(stats.selects, key=stats.selects.get)
+            logger.warning('Possible N+1 in %s %s: same SELECT ran %d times: %s',
+                           method, endpoint, repeated, statement[:200])
+        return response
+
+    def export(self):
+        """Prometheus text exposition of every series"""
+        with self._lock:
+            latency = {key: (list(h.buckets), h.sum, h.count) for key, h in self._latency.items()}
+            responses = dict(self._responses)
+            queries = dict(self._queries)
+            db_seconds = dict(self._db_seconds)
+            n_plus_one = dict(self._n_plus_one)
+
+        lines = [
+            '# HELP quickplate_request_duration_seconds Request latency by endpoint',
+            '# TYPE quickplate_request_duration_seconds histogram'
+        ]
+        for (method, endpoint), (buckets, total, count) in sorted(latency.items()):
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, hits in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                cumulative += hits
+                lines.append(f'quickplate_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'quickplate_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'quickplate_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [
+            '# HELP quickplate_responses_total Responses by endpoint and status code',
+            '# TYPE quickplate_responses_total counter'
+        ]
+        for (method, endpoint, status), count in sorted(responses.items()):
+            lines.append(f'quickplate_responses_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}')
+
+        for name, kind, help_text, series in (
+            ('quickplate_db_queries_total', 'counter', 'SQL statements run while serving the endpoint', queries),
+            ('quickplate_db_seconds_total', 'counter', 'Time spent in SQL while serving the endpoint', db_seconds),
+            ('quickplate_n_plus_one_total', 'counter', 'Requests that repeated one SELECT past the N+1 threshold', n_plus_one),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for endpoint, value in sorted(series.items()):
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+def _start_request():
+    _current.set(RequestStats())
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, '_metrics_started', None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - started
+    if statement.startswith('SELECT'):
+        stats.selects[statement] = stats.selects.get(statement, 0) + 1
+
+# Singleton instance
+metrics = Metrics()
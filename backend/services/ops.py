@@ -0,0 +1,135 @@
+"""
+Streaming exports and batched cleanups for manage.py.
+Exports read with yield_per (a server-side cursor on Postgres), so memory
+stays flat however many rows match. Cleanups delete by primary key in
+batches, one short transaction per batch, so the app keeps running.
+"""
+
+import csv
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, exists, and_
+from models import db, User, Meal, Order, OrderItem, LoyaltyTransaction, UserRecommendation
+
+def parse_date(text):
+    """YYYY-MM-DD (or a full ISO timestamp) -> datetime"""
+    return datetime.fromisoformat(text)
+
+def _date_range(column, since=None, until=None):
+    """since is inclusive; a bare --until date includes that whole day"""
+    conditions = []
+    if since:
+        conditions.append(column >= parse_date(since))
+    if until:
+        end = parse_date(until)
+        if len(until) == 10:
+            end += timedelta(days=1)
+        conditions.append(column < end)
+    return conditions
+
+def export_users(since=None, until=None, user=None, has_password=None, **_):
+    stmt = select(
+        User.id, User.sap_id, User.name, User.email, User.phone, User.loyalty_points,
+        (User.password_hash.isnot(None)).label('has_password'), User.created_at
+    ).where(*_date_range(User.created_at, since, until)).order_by(User.id)
+    if user:
+        stmt = stmt.where(User.id == user)
+    if has_password is not None:
+        stmt = stmt.where(User.password_hash.isnot(None) if has_password else User.password_hash.is_(None))
+    return stmt, None
+
+def export_meals(**_):
+    stmt = select(Meal.id, Meal.name, Meal.category, Meal.price, Meal.available, Meal.prep_time).order_by(Meal.id)
+    return stmt, None
+
+def export_orders(since=None, until=None, user=None, status=None, **_):
+    # One row per line item, ordered by order; _group_lines folds them back into orders
+    stmt = select(
+        Order.id, Order.user_id, Order.total, Order.status, Order.pickup_time, Order.payment_method,
+        Order.created_at, OrderItem.qty, OrderItem.name.label('item')
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id).where(
+        *_date_range(Order.created_at, since, until)
+    ).order_by(Order.id, OrderItem.id)
+    if user:
+        stmt = stmt.where(Order.user_id == user)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    return stmt, _group_lines
+
+def _group_lines(rows):
+    """Merge consecutive line-item rows of the same order; holds one order at a time"""
+    current = None
+    for row in rows:
+        if current is not None and current['id'] != row.id:
+            yield current
+            current = None
+        if current is None:
+            current = {key: value for key, value in row._mapping.items() if key not in ('qty', 'item')}
+            current['items'] = []
+        if row.item is not None:
+            current['items'].append({'name': row.item, 'quantity': row.qty})
+    if current is not None:
+        yield current
+
+EXPORTS = {
+    'users': export_users,
+    'meals': export_meals,
+    'orders': export_orders,
+}
+
+def stream(table, chunk_size=1000, **filters):
+    """Yield matching rows of an export as dicts, chunk_size rows fetched at a time"""
+    stmt, transform = EXPORTS[table](**filters)
+    result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+    rows = (row for partition in result.partitions() for row in partition)
+    if transform:
+        return transform(rows)
+    return (dict(row._mapping) for row in rows)
+
+def write(rows, fmt, out, progress=None, every=50000):
+    """Write dict rows as CSV or JSON Lines; returns the number written"""
+    count = 0
+    writer = None
+    for row in rows:
+        if fmt == 'jsonl':
+            out.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+        else:
+            if 'items' in row:
+                row = dict(row, items='; '.join(f"{item['quantity']}x {item['name']}" for item in row['items']))
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+        count += 1
+        if progress and count % every == 0:
+            progress(count)
+    return count
+
+def delete_passwordless_users(batch_size=1000, dry_run=False, progress=None):
+    """
+    Delete legacy accounts that never set a password, batch by batch.
+    Accounts with orders are kept (their history matters more than the
+    login). Returns (deleted, kept).
+    """
+    passwordless = User.password_hash.is_(None)
+    has_orders = exists().where(Order.user_id == User.id)
+    kept = db.session.scalar(select(db.func.count()).select_from(User).where(passwordless, has_orders))
+
+    if dry_run:
+        deleted = db.session.scalar(select(db.func.count()).select_from(User).where(passwordless, ~has_orders))
+        return deleted, kept
+
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(User.id).where(passwordless, ~has_orders).order_by(User.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        for model in (UserRecommendation, LoyaltyTransaction):
+            db.session.execute(delete(model).where(model.user_id.in_(ids)))
+        deleted += db.session.execute(delete(User).where(and_(User.id.in_(ids), passwordless))).rowcount
+        db.session.commit()
+        if progress:
+            progress(deleted)
+    return deleted, kept
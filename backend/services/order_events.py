@@ -0,0 +1,222 @@
+"""
+Order status events for Server-Sent Events streams.
+Every status change appends a row to order_events in the same transaction
+(record()), and its autoincrement id is the event id: a client resumes with
+Last-Event-ID on any worker. update_order_status and create_order publish
+straight to local subscribers after commit; one poller per process reads
+the log past the last id it saw to pick up changes committed by other
+workers. Ids can commit out of order (two concurrent transactions on
+Postgres), so ids skipped by the cursor are re-checked for
+ORDER_EVENTS_GAP_SECONDS before they are given up as rolled back. While
+nobody is subscribed the poller only moves its cursor to the newest id.
+Subscribers only wait on a queue, which gevent turns into a cheap greenlet
+wait: thousands of idle streams need no thread each.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import select, func
+from models import db, OrderEvent
+
+logger = logging.getLogger(__name__)
+
+# Ids from before the event log were microsecond timestamps; replay from the current state instead
+LEGACY_EVENT_ID = 10 ** 12
+
+def parse_event_id(value):
+    """Last-Event-ID as an event id, or None"""
+    try:
+        event_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return event_id if 0 <= event_id < LEGACY_EVENT_ID else None
+
+def make_event(event_id, order_id, user_id, status, created_at):
+    return {
+        'id': event_id,
+        'orderId': order_id,
+        'userId': user_id,
+        'data': {
+            'orderId': f'ORD-{order_id}',
+            'status': status,
+            'updatedAt': created_at.isoformat()
+        }
+    }
+
+def event_of(row):
+    return make_event(row.id, row.order_id, row.user_id, row.status, row.created_at)
+
+EVENT_COLUMNS = (OrderEvent.id, OrderEvent.order_id, OrderEvent.user_id, OrderEvent.status, OrderEvent.created_at)
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: status\ndata: {json.dumps(event['data'])}\n\n"
+
+class Subscription:
+    def __init__(self, bus, topic, max_queue):
+        self.bus = bus
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.last_sent = {}  # order_id -> last event id, drops duplicates from the poller
+        self.lagged = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Too slow to keep up: end the stream, the client resumes via Last-Event-ID
+            self.lagged = True
+
+    def stream(self, backlog, heartbeat):
+        """SSE body: backlog first, then live events with periodic heartbeats"""
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield from self._send(event)
+            while not self.lagged:
+                try:
+                    event = self.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield from self._send(event)
+        finally:
+            self.bus.unsubscribe(self)
+
+    def _send(self, event):
+        if event['id'] <= self.last_sent.get(event['orderId'], -1):
+            return
+        self.last_sent[event['orderId']] = event['id']
+        yield format_event(event)
+
+class OrderEventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}  # 'order:<id>' / 'user:<id>' -> set of subscriptions
+        self._poller = None
+        self._app = None
+        self.heartbeat = 15
+        self.poll_seconds = 1.0
+        self.gap_seconds = 30
+        self.max_queue = 100
+
+    def init_app(self, app):
+        self._app = app
+        self.heartbeat = app.config.get('ORDER_EVENTS_HEARTBEAT', self.heartbeat)
+        self.poll_seconds = app.config.get('ORDER_EVENTS_POLL_SECONDS', self.poll_seconds)
+        self.gap_seconds = app.config.get('ORDER_EVENTS_GAP_SECONDS', self.gap_seconds)
+        self.max_queue = app.config.get('ORDER_EVENTS_MAX_QUEUE', self.max_queue)
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic, self.max_queue)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+            self._start_poller()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+    @staticmethod
+    def record(order):
+        """Log the order's current status in the open transaction; publish() the result after commit"""
+        row = OrderEvent(order_id=order.id, user_id=order.user_id, status=order.status)
+        db.session.add(row)
+        db.session.flush()  # event id
+        return event_of(row)
+
+    def publish(self, event):
+        """Deliver a committed event to this process's subscribers"""
+        self._fan_out(event)
+
+    @staticmethod
+    def latest(order):
+        """The order's last event; orders from before the log get one made up from the row (id 0)"""
+        row = db.session.execute(
+            select(*EVENT_COLUMNS).where(OrderEvent.order_id == order.id).order_by(OrderEvent.id.desc()).limit(1)
+        ).first()
+        if row is not None:
+            return event_of(row)
+        return make_event(0, order.id, order.user_id, order.status, order.updated_at or order.created_at)
+
+    @staticmethod
+    def user_backlog(user_id, after, limit=100):
+        """A user's events after Last-Event-ID, oldest first"""
+        rows = db.session.execute(
+            select(*EVENT_COLUMNS)
+            .where(OrderEvent.user_id == user_id, OrderEvent.id > after)
+            .order_by(OrderEvent.id).limit(limit)
+        ).all()
+        return [event_of(row) for row in rows]
+
+    def _fan_out(self, event):
+        with self._lock:
+            targets = list(self._topics.get(f"order:{event['orderId']}", ())) + \
+                      list(self._topics.get(f"user:{event['userId']}", ()))
+        for subscription in targets:
+            subscription.deliver(event)
+
+    def _start_poller(self):
+        if self._poller is None and self._app is not None:
+            self._poller = threading.Thread(target=self._poll, name='order-events-poller', daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        """Forward events committed by other workers (see the module docstring)"""
+        with self._app.app_context():
+            cursor = self._newest()
+            gaps = {}  # event id skipped by the cursor -> monotonic time first missed
+            while True:
+                time.sleep(self.poll_seconds)
+                try:
+                    if not self.subscriber_count():
+                        # Nobody to tell: keep up with the log without reading it
+                        cursor, gaps = self._newest(cursor), {}
+                        continue
+                    rows = db.session.execute(
+                        select(*EVENT_COLUMNS).where(OrderEvent.id > cursor).order_by(OrderEvent.id).limit(500)
+                    ).all()
+                    if gaps:
+                        rows += db.session.execute(
+                            select(*EVENT_COLUMNS).where(OrderEvent.id.in_(list(gaps)))
+                        ).all()
+                except Exception as e:
+                    logger.warning("Order events poll error: %s", e)
+                    continue
+                finally:
+                    db.session.remove()
+
+                now = time.monotonic()
+                for row in sorted(rows, key=lambda row: row.id):
+                    if row.id > cursor:
+                        for missing in range(cursor + 1, min(row.id, cursor + 1 + 1000)):
+                            gaps[missing] = now
+                        cursor = row.id
+                    gaps.pop(row.id, None)
+                    self._fan_out(event_of(row))
+                # A gap that stays empty this long was a rolled back insert
+                gaps = {event_id: seen for event_id, seen in gaps.items() if now - seen < self.gap_seconds}
+
+    @staticmethod
+    def _newest(default=0):
+        try:
+            return db.session.execute(select(func.max(OrderEvent.id))).scalar() or default
+        except Exception as e:
+            logger.warning("Order events poll error: %s", e)
+            return default
+        finally:
+            db.session.remove()
+
+# Singleton instance
+order_events = OrderEventBus()
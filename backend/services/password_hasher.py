@@ -0,0 +1,99 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+class HasherBusy(Exception):
+    """
+    Raised when too many hashes are already queued, a hash didn't finish
+    within PASSWORD_HASH_TIMEOUT, or the pool lost a worker; callers answer 503
+    """
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, size-limited process pool so a burst of
+    logins can't pin every request worker on pbkdf2. At most `max_pending`
+    hashes may be queued or running; beyond that callers get HasherBusy
+    straight away instead of waiting in line. A hash the caller gave up on
+    keeps its slot until it actually finishes in the pool.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = None
+        self.method = 'pbkdf2:sha256:600000'
+        self.salt_length = 16
+        self.workers = 2
+        self.timeout = 10
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or max(1, self.workers) * 8
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with other parameters than PASSWORD_HASH_METHOD"""
+        return bool(password_hash) and password_hash.split('$', 1)[0] != self.method
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        executor = self._pool()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._replace(executor)
+            raise HasherBusy()
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            logger.warning("Password hash took longer than %ss", self.timeout)
+            raise HasherBusy()
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise HasherBusy()
+
+    def _pool(self):
+        # Created on first use so each gunicorn worker forks its own pool after startup
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    atexit.register(self._executor.shutdown, wait=False)
+        return self._executor
+
+    def _replace(self, broken):
+        """A pool process died: start a fresh pool on next use (once, however many callers saw it)"""
+        with self._executor_lock:
+            if self._executor is broken:
+                logger.error("Password hashing pool broke; starting a new one")
+                self._executor = None
+        broken.shutdown(wait=False)
+
+# Singleton instance
+password_hasher = PasswordHasher()
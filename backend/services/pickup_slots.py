@@ -0,0 +1,217 @@
+"""
+Pickup slot capacity.
+The day is cut into PICKUP_SLOT_MINUTES windows between PICKUP_OPEN and
+PICKUP_CLOSE, each with a capacity in prep-minutes: an order takes
+sum(prep_time x quantity) of its slot. create_order reserves with a
+single conditional UPDATE (reserved + n <= capacity), inside the order's
+transaction, so concurrent orders can't overfill a slot and a rolled
+back order gives its minutes back. An order larger than a whole slot
+still fits into an empty one.
+
+Remaining capacity for GET /api/orders/slots is served from an in-memory
+copy of each day's slots. It is updated as this worker commits orders and
+reloaded from the database when older than PICKUP_SLOT_SYNC_SECONDS, to
+pick up reservations made by other workers.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, PickupSlot
+from services.kitchen import parse_clock
+from services.price_index import price_index
+
+class OutsideHours(Exception):
+    """The requested pickup time is before opening or after closing"""
+
+class SlotFull(Exception):
+    """No room in the requested slot (or, for ASAP orders, in any slot left today)"""
+    def __init__(self, alternatives):
+        super().__init__(alternatives)
+        self.alternatives = alternatives  # nearby slot dicts with room, nearest first
+
+def _minutes(text):
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+class PickupSlots:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}  # date -> (loaded at, {start_minute: [capacity, reserved]})
+        self.slot_minutes = 15
+        self.open_minute = 8 * 60
+        self.close_minute = 21 * 60
+        self.capacity = 60
+        self.default_prep_time = 10
+        self.sync_seconds = 5
+
+    def init_app(self, app):
+        self.slot_minutes = app.config.get('PICKUP_SLOT_MINUTES', self.slot_minutes)
+        self.open_minute = _minutes(app.config.get('PICKUP_OPEN', '08:00'))
+        self.close_minute = _minutes(app.config.get('PICKUP_CLOSE', '21:00'))
+        # Default: every station busy for the whole slot
+        self.capacity = app.config.get('PICKUP_SLOT_CAPACITY') or (
+            app.config.get('KITCHEN_STATIONS', 4) * self.slot_minutes
+        )
+        self.default_prep_time = app.config.get('KITCHEN_DEFAULT_PREP_TIME', self.default_prep_time)
+        self.sync_seconds = app.config.get('PICKUP_SLOT_SYNC_SECONDS', self.sync_seconds)
+
+    def starts(self):
+        return range(self.open_minute, self.close_minute, self.slot_minutes)
+
+    @staticmethod
+    def label(minute):
+        """'12:30 PM', the format the app's time picker sends"""
+        return datetime(2000, 1, 1, minute // 60, minute % 60).strftime('%I:%M %p')
+
+    def _slot_of(self, minute):
+        return minute - (minute - self.open_minute) % self.slot_minutes
+
+    # -- reserving ---------------------------------------------------------
+
+    def _prep_times(self, order_items):
+        """prep_time per line item, from the price index (already cached by pricing)"""
+        entries = price_index.lookup(item.meal_id for item in order_items)
+        return [
+            (entries.get(item.meal_id) and entries[item.meal_id].prep_time) or self.default_prep_time
+            for item in order_items
+        ]
+
+    def reserve(self, pickup_time, order_items, now=None):
+        """
+        Reserve the order's prep-minutes in the slot holding pickup_time, or
+        for ASAP orders (no or unparseable time) in the first slot with room
+        once the longest item could be ready. Does not commit. Returns
+        (PickupSlot id, date, start_minute, minutes); pass it to committed()
+        after the order commits. Raises OutsideHours or SlotFull.
+        """
+        now = now or datetime.now()
+        prep_times = self._prep_times(order_items)
+        minutes = sum(prep * item.qty for prep, item in zip(prep_times, order_items))
+        clock = parse_clock(pickup_time)
+
+        if clock is not None:
+            day = now.date()
+            minute = clock.hour * 60 + clock.minute
+            if minute < now.hour * 60 + now.minute - 60:
+                day += timedelta(days=1)  # e.g. placed 23:50 for 00:10, as in the kitchen
+            if not self.open_minute <= minute < self.close_minute:
+                raise OutsideHours()
+            candidates = [self._slot_of(minute)]
+        else:
+            ready = now + timedelta(minutes=max(prep_times, default=self.default_prep_time))
+            day = now.date()
+            earliest = max(self._slot_of(ready.hour * 60 + ready.minute), self.open_minute)
+            # Nothing left once the order couldn't be ready before closing
+            candidates = [start for start in self.starts() if start >= earliest] if ready.date() == day else []
+
+        counter = self._counter(day)
+        created = False
+        for start in candidates:
+            capacity, reserved = counter.get(start, (self.capacity, 0))
+            if len(candidates) > 1 and reserved and reserved + minutes > capacity:
+                continue  # known full; for a single candidate the UPDATE decides
+            slot_id = self._take(day, start, minutes)
+            if slot_id is None and not created:
+                # First order for the day in this database: create its slots and retry
+                self._create_day(day)
+                created = True
+                slot_id = self._take(day, start, minutes)
+            if slot_id is not None:
+                return slot_id, day, start, minutes
+
+        # Someone else filled it: reload so the alternatives are current
+        self._load(day)
+        raise SlotFull(self._alternatives(day, candidates[0] if clock is not None else None, minutes, now))
+
+    # Built once: it runs under the write lock of every checkout
+    _TAKE = (
+        update(PickupSlot.__table__)
+        .where(
+            PickupSlot.date == bindparam('day'),
+            PickupSlot.start_minute == bindparam('start'),
+            (PickupSlot.reserved + bindparam('minutes') <= PickupSlot.capacity) | (PickupSlot.reserved == 0)
+        )
+        .values(reserved=PickupSlot.reserved + bindparam('minutes'))
+        .returning(PickupSlot.id)
+    )
+
+    def _take(self, day, start, minutes):
+        """UPDATE ... SET reserved = reserved + n WHERE it fits; the slot id, or None"""
+        return db.session.execute(self._TAKE, {'day': day, 'start': start, 'minutes': minutes}).scalar()
+
+    def _create_day(self, day):
+        rows = [{'date': day, 'start_minute': start, 'capacity': self.capacity, 'reserved': 0} for start in self.starts()]
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        db.session.execute(
+            dialect.insert(PickupSlot).on_conflict_do_nothing(index_elements=['date', 'start_minute']),
+            rows
+        )
+
+    def committed(self, reservation):
+        """The order holding this reservation committed: count it locally"""
+        _, day, start, minutes = reservation
+        with self._lock:
+            entry = self._days.get(day)
+            if entry is not None:
+                slot = entry[1].setdefault(start, [self.capacity, 0])
+                slot[1] += minutes
+
+    # -- availability --------------------------------------------------------
+
+    def _load(self, day):
+        """Read one day's slots (a range scan of the unique index) into the counter"""
+        slots = {
+            start: [capacity, reserved]
+            for start, capacity, reserved in db.session.execute(
+                select(PickupSlot.start_minute, PickupSlot.capacity, PickupSlot.reserved)
+                .where(PickupSlot.date == day)
+            )
+        }
+        with self._lock:
+            self._days[day] = (time.monotonic(), slots)
+            # Keep a few days around, not the whole history
+            for old in [d for d in self._days if d < day - timedelta(days=7)]:
+                del self._days[old]
+
+    def _counter(self, day):
+        entry = self._days.get(day)
+        if entry is None or time.monotonic() - entry[0] > self.sync_seconds:
+            self._load(day)
+            entry = self._days[day]
+        return entry[1]
+
+    def _slot_dict(self, start, capacity, reserved):
+        return {
+            'time': f'{start // 60:02d}:{start % 60:02d}',
+            'label': self.label(start),
+            'capacity': capacity,
+            'remaining': max(0, capacity - reserved)
+        }
+
+    def availability(self, day, now=None):
+        """Slots of the day with their remaining prep-minutes; for today, the current slot onwards"""
+        now = now or datetime.now()
+        earliest = now.hour * 60 + now.minute - self.slot_minutes + 1 if day == now.date() else 0
+        counter = self._counter(day)
+        with self._lock:
+            return [
+                self._slot_dict(start, *counter.get(start, (self.capacity, 0)))
+                for start in self.starts() if start >= earliest
+            ]
+
+    def _alternatives(self, day, near, minutes, now, limit=3):
+        """Slots that still fit the order, nearest to the requested one first"""
+        counter = self._counter(day)
+        earliest = now.hour * 60 + now.minute if day == now.date() else 0
+        options = []
+        for start in self.starts():
+            capacity, reserved = counter.get(start, (self.capacity, 0))
+            if start >= earliest and (reserved == 0 or reserved + minutes <= capacity):
+                options.append((abs(start - near) if near is not None else start, start, capacity, reserved))
+        return [self._slot_dict(start, capacity, reserved) for _, start, capacity, reserved in sorted(options)[:limit]]
+
+# Singleton instance
+pickup_slots = PickupSlots()
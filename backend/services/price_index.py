@@ -0,0 +1,112 @@
+"""
+In-memory meal_id -> MenuEntry(name, category, price, available, prep_time) index.
+Used to price orders on the server and by the kitchen scheduler. Entries
+are loaded on demand, with every miss in a request resolved by one
+batched IN query. The index is dropped when this process's menu version
+changes, and after MENU_CACHE_TTL seconds to pick up edits made by
+other processes.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import select
+from models import db, Meal, OrderItem
+from services.menu_cache import menu_cache
+
+MenuEntry = namedtuple('MenuEntry', 'name category price available prep_time')
+
+class UnavailableItems(Exception):
+    """Some meals in the order don't exist or are switched off"""
+    def __init__(self, meal_ids):
+        super().__init__(meal_ids)
+        self.meal_ids = meal_ids
+
+class PriceChanged(Exception):
+    """The client priced the order from an out-of-date menu"""
+    def __init__(self, prices):
+        super().__init__(prices)
+        self.prices = prices  # meal_id -> current price
+
+class PriceIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (None, 0.0, {})  # (menu version, loaded at, meal_id -> MenuEntry or None)
+        self.ttl = 60
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.ttl = app.config.get('MENU_CACHE_TTL', self.ttl)
+
+    def lookup(self, meal_ids):
+        """
+        meal_id -> MenuEntry for the given ids; ids with no meal map to None.
+        At most one query, for the ids not cached yet.
+        """
+        version, loaded_at, entries = self._state
+        if version != menu_cache.version or time.monotonic() - loaded_at > self.ttl:
+            version, loaded_at, entries = menu_cache.version, time.monotonic(), {}
+
+        wanted = {meal_id for meal_id in meal_ids if meal_id is not None}
+        missing = wanted - entries.keys()
+        self.hits += len(wanted) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            found = {
+                row.id: MenuEntry(row.name, row.category, row.price, bool(row.available), row.prep_time)
+                for row in db.session.execute(
+                    select(Meal.id, Meal.name, Meal.category, Meal.price, Meal.available, Meal.prep_time)
+                    .where(Meal.id.in_(missing))
+                )
+            }
+            # Copy on write: readers in other threads keep a consistent dict
+            entries = {**entries, **dict.fromkeys(missing), **found}
+            with self._lock:
+                self._state = (version, loaded_at, entries)
+        elif entries is not self._state[2]:
+            with self._lock:
+                self._state = (version, loaded_at, entries)
+
+        return {meal_id: entries.get(meal_id) for meal_id in wanted}
+
+    def price_items(self, items):
+        """
+        Build (order items, total) for the client's [{mealId, quantity, price}]
+        lines from server-side prices, checking every line in one pass.
+        Raises ValueError for malformed lines, UnavailableItems for unknown or
+        unavailable meals, and PriceChanged when a price the client sent no
+        longer matches the menu.
+        """
+        lines = []
+        for item in items:
+            meal_id = int(item['mealId'])
+            quantity = int(item.get('quantity') or 1)
+            if quantity < 1:
+                raise ValueError(f'Invalid quantity for meal {meal_id}')
+            lines.append((meal_id, quantity, item.get('price')))
+
+        entries = self.lookup(meal_id for meal_id, _, _ in lines)
+        unavailable = sorted({meal_id for meal_id, entry in entries.items() if entry is None or not entry.available})
+        if unavailable:
+            raise UnavailableItems(unavailable)
+        stale = {
+            meal_id: entries[meal_id].price
+            for meal_id, _, client_price in lines
+            if client_price is not None and abs(float(client_price) - entries[meal_id].price) > 0.005
+        }
+        if stale:
+            raise PriceChanged(stale)
+
+        order_items = [
+            OrderItem(meal_id=meal_id, name=entries[meal_id].name, qty=quantity, unit_price=entries[meal_id].price)
+            for meal_id, quantity, _ in lines
+        ]
+        total = round(sum(item.unit_price * item.qty for item in order_items), 2)
+        return order_items, total
+
+    def stats(self):
+        return {'entries': len(self._state[2]), 'hits': self.hits, 'misses': self.misses}
+
+# Singleton instance
+price_index = PriceIndex()
@@ -0,0 +1,352 @@
+"""
+Local meal recommender.
+Learns from order history kept in process memory: an item-item
+co-occurrence matrix (how many orders contain both meals), what each user
+has ordered, and how popular every meal is in each part of the day. A
+request scores every available meal as
+
+    similarity to the user's history + the user's own favourites
+    + popularity at this time of day + category matching the daypart
+
+which is a handful of NumPy vector operations, well under a millisecond.
+
+create_order feeds new orders in as they are placed. Orders taken by other
+workers are read every RECOMMENDER_SYNC_SECONDS, past the highest order id
+seen so far, so a sync never rereads history. The first read, of the whole
+history, runs on a background thread (RECOMMENDER_WARM_UP): started when a
+gunicorn worker boots (gunicorn.conf.py), else by the first recommendation.
+Until it finishes, requests are answered from what has been loaded so far.
+Under gevent that thread is a greenlet, so the load yields between chunks
+to let the worker keep serving and heartbeating.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import select
+from models import db, Meal, Order, OrderItem, UserRecommendation
+from services.menu_cache import menu_cache
+
+logger = logging.getLogger(__name__)
+
+DAYPARTS = ('Breakfast', 'Lunch', 'Snacks', 'Dinner')
+
+def daypart(hour):
+    """Index into DAYPARTS for a canteen wall-clock hour"""
+    if 6 <= hour < 11:
+        return 0
+    if 11 <= hour < 16:
+        return 1
+    if 19 <= hour < 23:
+        return 3
+    return 2
+
+def _local_hour(created_at):
+    # created_at is naive UTC; dayparts are canteen wall-clock time
+    return datetime.fromtimestamp(created_at.replace(tzinfo=timezone.utc).timestamp()).hour
+
+class Recommender:
+    SIMILARITY_WEIGHT = 1.0
+    FAVOURITE_WEIGHT = 0.5
+    POPULARITY_WEIGHT = 0.3
+    CATEGORY_WEIGHT = 0.4
+    SYNC_CHUNK = 5000  # order lines per query partition
+    SYNC_PAUSE = 0.001  # seconds between partitions
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._latencies = deque(maxlen=500)  # seconds per recommend()
+        self._warming = None
+        self._app = None
+        self.top_n = 3
+        self.sync_seconds = 30
+        self.warm_up_enabled = True
+        self._reset()
+
+    def init_app(self, app):
+        self._app = app
+        self.top_n = app.config.get('RECOMMENDER_TOP_N', self.top_n)
+        self.sync_seconds = app.config.get('RECOMMENDER_SYNC_SECONDS', self.sync_seconds)
+        self.warm_up_enabled = app.config.get('RECOMMENDER_WARM_UP', self.warm_up_enabled)
+
+    def _reset(self):
+        self._columns = {}                            # meal_id -> matrix column
+        self._names = {}                              # column -> last known meal name
+        self._cooccurrence = np.zeros((0, 0))         # diagonal: orders containing the meal
+        self._similarity = np.zeros((0, 0))           # cosine of co-occurrence, zero diagonal
+        self._popularity = np.zeros((len(DAYPARTS), 0))  # quantity ordered per daypart
+        self._history = {}                            # user_id -> {column: quantity}
+        self._catalog = None                          # available meals, see _available()
+        self._catalog_version = None
+        self._watermark = 0                           # highest order id read from the database
+        self._local = set()                           # ids above the watermark added by this worker
+        self._synced_at = 0.0
+        self.ready = False                            # the first sync has finished
+        self.orders_seen = 0
+
+    # -- learning from orders -----------------------------------------------
+
+    def add_order(self, order):
+        """Learn from an order just placed by this worker"""
+        with self._lock:
+            if order.id <= self._watermark or order.id in self._local:
+                return
+            self._local.add(order.id)
+            self._ingest([
+                (order.id, order.user_id, order.created_at, item.meal_id, item.name, item.qty)
+                for item in order.items
+            ])
+
+    def _ingest(self, rows):
+        """Fold complete orders, as (order_id, user_id, created_at, meal_id, name, qty) rows, into the model"""
+        rows = [row for row in rows if row[3] is not None]
+        if not rows:
+            return
+
+        with self._lock:
+            columns = np.array([self._column(row[3], row[4]) for row in rows])
+            _, order_rows = np.unique([row[0] for row in rows], return_inverse=True)
+            incidence = np.zeros((order_rows.max() + 1, len(self._columns)))
+            incidence[order_rows, columns] = 1
+            self._cooccurrence += incidence.T @ incidence
+
+            quantities = np.array([row[5] for row in rows], dtype=float)
+            parts = np.array([daypart(_local_hour(row[2])) for row in rows])
+            np.add.at(self._popularity, (parts, columns), quantities)
+
+            for (_, user_id, _, _, _, qty), column in zip(rows, columns):
+                history = self._history.setdefault(user_id, {})
+                history[column] = history.get(column, 0) + qty
+
+            self.orders_seen += incidence.shape[0]
+            self._refresh_similarity(np.unique(columns))
+
+    def _column(self, meal_id, name=None):
+        column = self._columns.get(meal_id)
+        if column is None:
+            column = self._columns[meal_id] = len(self._columns)
+            grow = len(self._columns) - self._cooccurrence.shape[0]
+            self._cooccurrence = np.pad(self._cooccurrence, ((0, grow), (0, grow)))
+            self._similarity = np.pad(self._similarity, ((0, grow), (0, grow)))
+            self._popularity = np.pad(self._popularity, ((0, 0), (0, grow)))
+        if name:
+            self._names[column] = name
+        return column
+
+    def _refresh_similarity(self, touched):
+        """Recompute cosine similarity for the rows and columns of meals whose counts changed"""
+        norms = np.sqrt(np.diag(self._cooccurrence))
+        denominator = norms[touched, None] * norms[None, :]
+        rows = np.divide(self._cooccurrence[touched], denominator,
+                         out=np.zeros_like(denominator), where=denominator > 0)
+        rows[np.arange(len(touched)), touched] = 0
+        self._similarity[touched] = rows
+        self._similarity[:, touched] = rows.T
+
+    # -- keeping in step with the database ----------------------------------
+
+    def warm_up(self):
+        """Start the first sync on a background thread (no-op while one runs)"""
+        with self._lock:
+            if self._warming is not None or self._app is None:
+                return
+            self._warming = threading.Thread(target=self._warm_up, name='recommender-warm-up', daemon=True)
+            self._warming.start()
+
+    def _warm_up(self):
+        with self._app.app_context():
+            try:
+                with self._sync_lock:
+                    self.sync()
+                logger.info("Recommender loaded %d orders", self.orders_seen)
+            except Exception as e:
+                logger.warning("Recommender warm-up failed: %s", e)
+                with self._lock:
+                    self._warming = None  # the next request retries
+            finally:
+                db.session.remove()
+
+    def _sync(self):
+        if not self.ready and self.warm_up_enabled:
+            # Never load the whole history on a request thread
+            self.warm_up()
+            return
+        if time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        # One sync at a time; other requests answer from the current model
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync()
+        finally:
+            self._sync_lock.release()
+
+    def sync(self):
+        """Read orders placed since the last sync (all of them on the first call)"""
+        stmt = (
+            select(Order.id, Order.user_id, Order.created_at, OrderItem.meal_id, OrderItem.name, OrderItem.qty)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.id > self._watermark)
+            .order_by(Order.id)
+            .execution_options(yield_per=self.SYNC_CHUNK)
+        )
+        watermark = self._watermark
+        pending = []
+        for chunk in db.session.execute(stmt).partitions():
+            pending.extend(chunk)
+            # Hold back the last order: its remaining lines may be in the next chunk
+            last = pending[-1][0]
+            complete = [row for row in pending if row[0] != last]
+            pending = [row for row in pending if row[0] == last]
+            self._ingest([row for row in complete if row[0] not in self._local])
+            watermark = max(watermark, last)
+            # Yield: under gevent nothing else runs until this greenlet does, and
+            # sleep(0) would switch greenlets without polling for I/O
+            time.sleep(self.SYNC_PAUSE)
+        self._ingest([row for row in pending if row[0] not in self._local])
+
+        with self._lock:
+            self._watermark = watermark
+            self._local = {order_id for order_id in self._local if order_id > watermark}
+            self._catalog = None  # also pick up menu changes made elsewhere
+            self._synced_at = time.monotonic()
+            self.ready = True
+
+    def _available(self):
+        """Available meals as parallel arrays, reloaded when the menu changes"""
+        if self._catalog is not None and self._catalog_version == menu_cache.version:
+            return self._catalog
+
+        meals = db.session.execute(
+            select(Meal.id, Meal.name, Meal.category).where(Meal.available == True)
+        ).all()
+        with self._lock:
+            self._catalog = {
+                'columns': np.array([self._column(meal.id, meal.name) for meal in meals], dtype=int),
+                'meal_ids': [meal.id for meal in meals],
+                'names': [meal.name for meal in meals],
+                'categories': [meal.category for meal in meals],
+                'dayparts': np.array([DAYPARTS.index(meal.category) if meal.category in DAYPARTS else -1
+                                      for meal in meals], dtype=int)
+            }
+            self._catalog_version = menu_cache.version
+        return self._catalog
+
+    # -- answering ----------------------------------------------------------
+
+    def recommend(self, user_id, limit=None, now=None):
+        """Top available meals for a user, best first, as {mealId, name, reason, category}"""
+        self._sync()
+        catalog = self._available()
+        started = time.perf_counter()
+        recommendations = self.rank([user_id], daypart((now or datetime.now()).hour), limit or self.top_n, catalog)[0]
+        self._latencies.append(time.perf_counter() - started)
+        return recommendations
+
+    def rank(self, user_ids, part, limit, catalog=None):
+        """
+        Top `limit` available meals for each of user_ids in one vectorized
+        pass, as a list of [{mealId, name, reason, category, score}, ...].
+        """
+        catalog = catalog or self._available()
+        columns = catalog['columns']
+        if not columns.size:
+            return [[] for _ in user_ids]
+
+        with self._lock:
+            history = np.zeros((len(user_ids), len(self._columns)))
+            for row, user_id in enumerate(user_ids):
+                for column, qty in self._history.get(user_id, {}).items():
+                    history[row, column] = qty
+            similarity = self._similarity[:, columns]
+            popularity = self._popularity[part, columns]
+
+        totals = history.sum(axis=1, keepdims=True)
+        favourites = np.divide(history, totals, out=np.zeros_like(history), where=totals > 0)
+        peak = popularity.max()
+        terms = np.stack([
+            self.SIMILARITY_WEIGHT * (favourites @ similarity),
+            self.FAVOURITE_WEIGHT * favourites[:, columns],
+            np.broadcast_to(self.POPULARITY_WEIGHT * (popularity / peak if peak else popularity), history[:, columns].shape),
+            np.broadcast_to(self.CATEGORY_WEIGHT * (catalog['dayparts'] == part), history[:, columns].shape)
+        ])
+        scores = terms.sum(axis=0)
+        top = np.argsort(-scores, axis=1, kind='stable')[:, :limit]
+
+        # For similarity picks: the history meal that contributed most, per (user, pick)
+        partners = np.argmax(favourites[:, :, None] * similarity[:, top].transpose(1, 0, 2), axis=1)
+
+        return [
+            [
+                {
+                    'mealId': str(catalog['meal_ids'][i]),
+                    'name': catalog['names'][i],
+                    'reason': self._reason(terms[:, row, i], partners[row, rank], part, catalog['categories'][i]),
+                    'category': catalog['categories'][i],
+                    'score': float(scores[row, i])
+                }
+                for rank, i in enumerate(top[row])
+            ]
+            for row in range(len(user_ids))
+        ]
+
+    def precomputed(self, user_id, limit=None, now=None):
+        """
+        The user's list from user_recommendations for the current daypart,
+        minus meals that have since become unavailable. Empty if the batch
+        job has not covered this user yet.
+        """
+        part = DAYPARTS[daypart((now or datetime.now()).hour)]
+        rows = (UserRecommendation.query
+                .filter_by(user_id=user_id, daypart=part)
+                .order_by(UserRecommendation.rank)
+                .all())
+        if not rows:
+            return []
+        available = set(self._available()['meal_ids'])
+        return [row.to_dict() for row in rows if row.meal_id in available][:limit or self.top_n]
+
+    def users(self):
+        """Ids of every user with order history in the model"""
+        with self._lock:
+            return sorted(self._history)
+
+    @property
+    def watermark(self):
+        return self._watermark
+
+    def _reason(self, terms, partner, part, category):
+        # Personal signals explain a pick better than general ones
+        if terms[0] > 0 or terms[1] > 0:
+            if terms[1] >= terms[0]:
+                return 'One of your favourites'
+            partner = self._names.get(int(partner))
+            return f'Goes well with your {partner}' if partner else 'Similar to what you order'
+        if terms[2] > 0:
+            return f'Popular at {DAYPARTS[part].lower()} time'
+        return f'On the {category} menu'
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6, 1)
+
+        with self._lock:
+            return {
+                'meals': len(self._columns),
+                'users': len(self._history),
+                'ordersSeen': self.orders_seen,
+                'watermark': self._watermark,
+                'ready': self.ready,
+                'latencyUs': {'p50': percentile(0.50), 'p95': percentile(0.95)}
+            }
+
+# Singleton instance
+recommender = Recommender()
@@ -0,0 +1,230 @@
+"""
+Sales rollups for the admin dashboard.
+sales_hourly holds orders, items, revenue and loyalty points per UTC
+hour; item_sales_hourly holds quantity and revenue per meal per hour.
+create_order and the offer redemption route add to them with upserts in
+their own transaction, so the rollups commit (or roll back) with the data
+they summarize. Each hour is split over ROLLUP_SHARDS rows (an order goes
+to shard order id modulo ROLLUP_SHARDS): with a single row, every checkout
+in the hour would wait on its lock until the previous one committed.
+Readers sum the shards. Dashboard reads are range scans of at most
+24 x ROLLUP_SHARDS rows per day, plus the per meal rows, however many
+orders there are.
+
+The rollups are stored by UTC hour; stats() reports them in canteen local
+time, the same days the forecast and the pickup slots use.
+
+rebuild() recomputes them from orders and the loyalty ledger: used by the
+seeder, the migration that introduced them, and manage.py rollup-rebuild.
+Callers own the transaction: nothing here commits.
+"""
+
+import random
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Order, OrderItem, Meal, LoyaltyTransaction, SalesHourly, ItemSalesHourly
+from services.price_index import price_index
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def to_utc(moment):
+    """Naive UTC for a datetime with an offset, or a naive one in canteen local time"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+def to_local(moment):
+    """Canteen local time (naive) of a naive UTC datetime"""
+    return moment.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+_upserts = {}
+
+def _upsert(model, keys, rows, add, replace=()):
+    """INSERT ... ON CONFLICT (keys) DO UPDATE: add columns in `add`, overwrite those in `replace`"""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    # Built once per statement shape, on the table rather than the model: checkouts run
+    # this while holding the SQLite write lock, and building the ORM statement dominated it
+    cache_key = (dialect.__name__, model, tuple(keys), tuple(add), tuple(replace))
+    statement = _upserts.get(cache_key)
+    if statement is None:
+        table = model.__table__
+        statement = dialect.insert(table)
+        changes = {column: table.c[column] + statement.excluded[column] for column in add}
+        changes.update({column: statement.excluded[column] for column in replace})
+        statement = _upserts[cache_key] = statement.on_conflict_do_update(index_elements=keys, set_=changes)
+    db.session.execute(statement, rows)
+
+def record_order(order, points_issued=0, points_redeemed=0):
+    """Add a new order (already flushed, so created_at is set) to its hour"""
+    hour = _hour(order.created_at)
+    shard = order.id % current_app.config['ROLLUP_SHARDS']
+    _upsert(SalesHourly, ['hour', 'shard'], [{
+        'hour': hour,
+        'shard': shard,
+        'orders': 1,
+        'items': sum(item.qty for item in order.items),
+        'revenue': order.total,
+        'points_issued': points_issued,
+        'points_redeemed': points_redeemed
+    }], add=('orders', 'items', 'revenue', 'points_issued', 'points_redeemed'))
+
+    entries = price_index.lookup(item.meal_id for item in order.items)
+    lines = [
+        {
+            'hour': hour,
+            'meal_id': item.meal_id,
+            'shard': shard,
+            'name': item.name,
+            'category': entries[item.meal_id].category if entries.get(item.meal_id) else None,
+            'quantity': item.qty,
+            'revenue': item.unit_price * item.qty
+        }
+        for item in order.items if item.meal_id is not None
+    ]
+    if lines:
+        _upsert(ItemSalesHourly, ['hour', 'meal_id', 'shard'], lines, add=('quantity', 'revenue'), replace=('name', 'category'))
+
+def record_points(issued=0, redeemed=0, at=None):
+    """Loyalty points moved outside an order (e.g. spent on an offer)"""
+    _upsert(SalesHourly, ['hour', 'shard'], [{
+        'hour': _hour(at or datetime.utcnow()),
+        'shard': random.randrange(current_app.config['ROLLUP_SHARDS']),
+        'orders': 0,
+        'items': 0,
+        'revenue': 0,
+        'points_issued': issued,
+        'points_redeemed': redeemed
+    }], add=('points_issued', 'points_redeemed'))
+
+def _hour_bucket(column):
+    """
+    SQL expression truncating a timestamp to the hour, and a converter for
+    its values. Literal arguments, so SELECT and GROUP BY match textually.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.date_trunc(literal_column("'hour'"), column), lambda value: value
+    return func.strftime(literal_column("'%Y-%m-%d %H:00:00'"), column), datetime.fromisoformat
+
+def rebuild(since=None, batch_size=5000):
+    """
+    Recompute the rollups from hour(since) onwards (everything by default)
+    with three GROUP BY queries, into shard 0. Returns the number of hours
+    written.
+    """
+    since = _hour(since) if since else None
+    for model in (SalesHourly, ItemSalesHourly):
+        db.session.execute(delete(model).where(model.hour >= since) if since else delete(model))
+
+    hours = {}
+
+    def hour_row(hour):
+        row = hours.get(hour)
+        if row is None:
+            row = hours[hour] = {'hour': hour, 'orders': 0, 'items': 0, 'revenue': 0.0,
+                                 'points_issued': 0, 'points_redeemed': 0}
+        return row
+
+    bucket, to_hour = _hour_bucket(Order.created_at)
+    orders = select(bucket, func.count(Order.id), func.sum(Order.total)).group_by(bucket)
+    if since:
+        orders = orders.where(Order.created_at >= since)
+    for hour, count, revenue in db.session.execute(orders):
+        row = hour_row(to_hour(hour))
+        row['orders'], row['revenue'] = count, revenue or 0.0
+
+    items = (
+        select(bucket, OrderItem.meal_id, func.max(OrderItem.name), Meal.name, Meal.category,
+               func.sum(OrderItem.qty), func.sum(OrderItem.qty * OrderItem.unit_price))
+        .join(Order, Order.id == OrderItem.order_id)
+        .outerjoin(Meal, Meal.id == OrderItem.meal_id)
+        .group_by(bucket, OrderItem.meal_id, Meal.name, Meal.category)
+    )
+    if since:
+        items = items.where(Order.created_at >= since)
+    item_rows = []
+    for hour, meal_id, line_name, meal_name, category, quantity, revenue in db.session.execute(items):
+        hour = to_hour(hour)
+        hour_row(hour)['items'] += quantity
+        # Lines whose meal was deleted count towards the hour's items, but have no meal row
+        if meal_id is not None:
+            item_rows.append({'hour': hour, 'meal_id': meal_id, 'name': meal_name or line_name,
+                              'category': category, 'quantity': quantity, 'revenue': revenue})
+
+    bucket, to_hour = _hour_bucket(LoyaltyTransaction.created_at)
+    points = (
+        select(bucket,
+               func.sum(case((LoyaltyTransaction.delta > 0, LoyaltyTransaction.delta), else_=0)),
+               func.sum(case((LoyaltyTransaction.delta < 0, -LoyaltyTransaction.delta), else_=0)))
+        .where(LoyaltyTransaction.reason != 'opening_balance')
+        .group_by(bucket)
+    )
+    if since:
+        points = points.where(LoyaltyTransaction.created_at >= since)
+    for hour, issued, redeemed in db.session.execute(points):
+        row = hour_row(to_hour(hour))
+        row['points_issued'], row['points_redeemed'] = issued or 0, redeemed or 0
+
+    for model, rows in ((SalesHourly, list(hours.values())), (ItemSalesHourly, item_rows)):
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(insert(model), rows[start:start + batch_size])
+    return len(hours)
+
+def _average(revenue, orders):
+    return round(revenue / orders, 2) if orders else 0.0
+
+def stats(start, end, bucket='hour', top=10):
+    """
+    Dashboard numbers for [start, end) (naive UTC): totals, a per-hour (or
+    per-day) series in canteen local time, the top meals by quantity and
+    sales per category.
+    """
+    rows = db.session.execute(
+        select(SalesHourly).where(SalesHourly.hour >= start, SalesHourly.hour < end).order_by(SalesHourly.hour)
+    ).scalars().all()
+
+    series = {}
+    local = {}  # one timezone conversion per hour, not per shard
+    for row in rows:
+        hour = local.get(row.hour) or local.setdefault(row.hour, to_local(row.hour))
+        key = hour if bucket == 'hour' else hour.replace(hour=0, minute=0)
+        point = series.setdefault(key, {'orders': 0, 'items': 0, 'revenue': 0.0, 'pointsIssued': 0, 'pointsRedeemed': 0})
+        point['orders'] += row.orders
+        point['items'] += row.items
+        point['revenue'] += row.revenue
+        point['pointsIssued'] += row.points_issued
+        point['pointsRedeemed'] += row.points_redeemed
+
+    totals = {'orders': 0, 'items': 0, 'revenue': 0.0, 'pointsIssued': 0, 'pointsRedeemed': 0}
+    for point in series.values():
+        for name in totals:
+            totals[name] += point[name]
+        point['revenue'] = round(point['revenue'], 2)
+        point['averageTicket'] = _average(point['revenue'], point['orders'])
+    totals['revenue'] = round(totals['revenue'], 2)
+    totals['averageTicket'] = _average(totals['revenue'], totals['orders'])
+
+    meals = db.session.execute(
+        select(ItemSalesHourly.meal_id, func.max(ItemSalesHourly.name), func.max(ItemSalesHourly.category),
+               func.sum(ItemSalesHourly.quantity), func.sum(ItemSalesHourly.revenue))
+        .where(ItemSalesHourly.hour >= start, ItemSalesHourly.hour < end)
+        .group_by(ItemSalesHourly.meal_id)
+    ).all()
+    categories = {}
+    for _, _, category, quantity, revenue in meals:
+        entry = categories.setdefault(category, {'category': category, 'quantity': 0, 'revenue': 0.0})
+        entry['quantity'] += quantity
+        entry['revenue'] += revenue
+
+    return {
+        'totals': totals,
+        'series': [dict(point, start=key.isoformat()) for key, point in series.items()],
+        'topItems': [
+            {'mealId': str(meal_id), 'name': name, 'category': category, 'quantity': quantity, 'revenue': round(revenue, 2)}
+            for meal_id, name, category, quantity, revenue in sorted(meals, key=lambda meal: -meal[3])[:top]
+        ],
+        'categories': sorted(
+            (dict(entry, revenue=round(entry['revenue'], 2)) for entry in categories.values()),
+            key=lambda entry: -entry['revenue']
+        )
+    }
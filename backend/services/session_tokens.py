@@ -0,0 +1,72 @@
+"""
+Stateless signed session tokens.
+A token is "<user_id>.<expires>.<signature>", where the signature is an
+HMAC-SHA256 of "<user_id>.<expires>" keyed with SECRET_KEY. Verifying one
+needs no database access.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import time
+from functools import wraps
+from flask import current_app, g, request, jsonify
+from config import DEV_SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+def _sign(secret, payload):
+    digest = hmac.new(secret.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+def issue_token(user_id):
+    expires = int(time.time()) + current_app.config['TOKEN_TTL']
+    payload = f'{int(user_id)}.{expires}'
+    return f'{payload}.{_sign(current_app.config["SECRET_KEY"], payload)}'
+
+def verify_token(token):
+    """Return the user id a valid, unexpired token was issued for, else None"""
+    try:
+        user_id, expires, signature = token.split('.')
+        user_id, expires = int(user_id), int(expires)
+    except (AttributeError, ValueError):
+        return None
+    
+    expected = _sign(current_app.config['SECRET_KEY'], f'{user_id}.{expires}')
+    # As bytes: compare_digest rejects str with non-ASCII characters (TypeError)
+    if not hmac.compare_digest(signature.encode('utf-8'), expected.encode('ascii')) or expires < time.time():
+        return None
+    return user_id
+
+def load_identity():
+    """before_request hook: put the caller's user id (or None) on g.user_id"""
+    g.user_id = None
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        g.user_id = verify_token(header[len('Bearer '):].strip())
+
+def init_app(app):
+    # With the published default key anyone can sign a token for any user
+    if app.config['SECRET_KEY'] == DEV_SECRET_KEY:
+        if not (app.debug or app.testing):
+            raise RuntimeError('SECRET_KEY is not set; refusing to sign session tokens with the default key')
+        logger.warning('SECRET_KEY is not set; using the development key (debug mode only)')
+    app.before_request(load_identity)
+
+def login_required(view):
+    """Reject requests without a valid token, or for another user's user_id"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if g.get('user_id') is None:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        # Path and body user ids must match the token, never stand in for it
+        user_id = kwargs.get('user_id')
+        if user_id is None and request.is_json:
+            user_id = (request.get_json(silent=True) or {}).get('userId')
+        if user_id is not None and str(user_id) != str(g.user_id):
+            return jsonify({'error': 'Not allowed for this user'}), 403
+        
+        return view(*args, **kwargs)
+    return wrapper
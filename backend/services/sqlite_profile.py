@@ -0,0 +1,52 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+# Only meaningful for a QueuePool; the StaticPool used for in-memory SQLite rejects them
+POOL_SIZING_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+def _in_memory(url):
+    """The URLs Flask-SQLAlchemy serves from one StaticPool connection"""
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def configure_pool(app):
+    """Before db.init_app: drop the pool sizing options for in-memory SQLite URLs"""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if _in_memory(make_url(app.config['SQLALCHEMY_DATABASE_URI'])):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            name: value for name, value in options.items() if name not in POOL_SIZING_OPTIONS
+        }
+
+def begin_write():
+    """
+    Start the session's transaction with BEGIN IMMEDIATE on SQLite, taking
+    the write lock up front (waiting up to busy_timeout for it). A deferred
+    transaction takes it at its first write instead, and fails at once with
+    "database is locked" if another connection committed since it began
+    reading. Call before a transaction's first statement; no-op on other
+    databases or when a transaction is already open.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    dbapi_connection = connection.connection.driver_connection
+    if not dbapi_connection.in_transaction:
+        dbapi_connection.execute('BEGIN IMMEDIATE')
+
+def init_app(app):
+    """Apply Config.SQLITE_PRAGMAS to every new connection when running on SQLite"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    
+    with app.app_context():
+        engine = db.engine
+    
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    
+    event.listen(engine, 'connect', set_pragmas)
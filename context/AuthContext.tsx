@@ -3,7 +3,7 @@ import { UserProfile } from '../constants/types';
 import { Storage, KEYS } from '../services/storage';
 import { apiService } from '../services/api';
 import { useRouter, useSegments } from 'expo-router';
-import React, { createContext, useContext, useEffect, useState } from 'react';
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
 
 type AuthType = {
     user: any | null;
@@ -13,6 +13,8 @@ type AuthType = {
     addLoyaltyPoints: (points: number) => void;
     redeemPoints: (points: number) => boolean;
     orders: any[];
+    hasMoreOrders: boolean;
+    loadMoreOrders: () => Promise<void>;
     placeOrder: (order: any) => Promise<void>;
     updateProfile: (data: Partial<UserProfile>) => Promise<void>;
 };
@@ -25,6 +27,8 @@ const AuthContext = createContext<AuthType>({
     addLoyaltyPoints: () => { },
     redeemPoints: () => false,
     orders: [],
+    hasMoreOrders: false,
+    loadMoreOrders: async () => { },
     placeOrder: async () => { },
     updateProfile: async () => { },
 });
@@ -54,11 +58,16 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const [user, setUser] = useState<any>(undefined);
     const [isLoading, setIsLoading] = useState(false);
     const [orders, setOrders] = useState<any[]>([]);
+    // Where the next (older) page of order history starts; null once it's all loaded
+    const [ordersCursor, setOrdersCursor] = useState<string | null>(null);
+    const loadingMoreOrders = useRef(false);
+    const pendingOrder = useRef<{ payload: string; key: string } | null>(null);
 
     useEffect(() => {
         const loadSession = async () => {
             // Check for stored user session
             const storedUser = await Storage.getItem(KEYS.USER_PROFILE);
+            apiService.setToken(await Storage.getItem(KEYS.AUTH_TOKEN));
 
             if (storedUser) {
                 // Fetch fresh data from backend
@@ -68,6 +77,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
                     setUser(userData);
                     setOrders(ordersData.orders || []);
+                    setOrdersCursor(ordersData.nextCursor || null);
                 } catch (error) {
                     console.error('Failed to load user data:', error);
                     // Fallback to stored data
@@ -90,11 +100,14 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
             if (response.success) {
                 const userData = response.user;
+                apiService.setToken(response.token);
+                await Storage.setItem(KEYS.AUTH_TOKEN, response.token);
                 await Storage.setItem(KEYS.USER_PROFILE, userData);
 
                 // Fetch orders
                 const ordersData = await apiService.getUserOrders(userData.id);
                 setOrders(ordersData.orders || []);
+                setOrdersCursor(ordersData.nextCursor || null);
 
                 setUser(userData);
             }
@@ -107,8 +120,28 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
     const signOut = async () => {
         await Storage.removeItem(KEYS.USER_PROFILE);
+        await Storage.removeItem(KEYS.AUTH_TOKEN);
+        apiService.setToken(null);
         setUser(null);
         setOrders([]);
+        setOrdersCursor(null);
+    };
+
+    const loadMoreOrders = async () => {
+        if (!user || !ordersCursor || loadingMoreOrders.current) return;
+        loadingMoreOrders.current = true;
+        try {
+            const ordersData = await apiService.getUserOrders(user.id, ordersCursor);
+            setOrders(current => {
+                const seen = new Set(current.map(order => order.id));
+                return [...current, ...(ordersData.orders || []).filter((order: any) => !seen.has(order.id))];
+            });
+            setOrdersCursor(ordersData.nextCursor || null);
+        } catch (error) {
+            console.error('Failed to load more orders:', error);
+        } finally {
+            loadingMoreOrders.current = false;
+        }
     };
 
     const addLoyaltyPoints = async (points: number) => {
@@ -136,16 +169,29 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const placeOrder = async (orderDetails: any) => {
         if (!user) return;
 
+        const orderData = {
+            userId: user.id,
+            items: orderDetails.items,
+            total: orderDetails.total,
+            pickupTime: orderDetails.pickupTime,
+            paymentMethod: orderDetails.paymentMethod,
+            pointsUsed: orderDetails.pointsUsed || 0,
+        };
+
+        // Tapping "Place order" again after a timeout resends the same key,
+        // so an order that did reach the server is not placed twice
+        const payload = JSON.stringify(orderData);
+        if (!pendingOrder.current || pendingOrder.current.payload !== payload) {
+            pendingOrder.current = {
+                payload,
+                key: `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`,
+            };
+        }
+
         try {
             // Create order via API
-            const response = await apiService.createOrder({
-                userId: user.id,
-                items: orderDetails.items,
-                total: orderDetails.total,
-                pickupTime: orderDetails.pickupTime,
-                paymentMethod: orderDetails.paymentMethod,
-                pointsUsed: orderDetails.pointsUsed || 0,
-            });
+            const response = await apiService.createOrder(orderData, pendingOrder.current.key);
+            pendingOrder.current = null;
 
             if (response.success) {
                 // Update local orders
@@ -181,7 +227,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     };
 
     return (
-        <AuthContext.Provider value={{ user, isLoading, signIn, signOut, addLoyaltyPoints, redeemPoints, orders, placeOrder, updateProfile }}>
+        <AuthContext.Provider value={{ user, isLoading, signIn, signOut, addLoyaltyPoints, redeemPoints, orders, hasMoreOrders: ordersCursor !== null, loadMoreOrders, placeOrder, updateProfile }}>
             {children}
         </AuthContext.Provider>
     );
@@ -2,13 +2,24 @@ import { API_BASE_URL, API_ENDPOINTS } from '../constants/api';
 
 class APIService {
     private baseURL: string;
+    // Last ETag and body per GET url, replayed when the server answers 304
+    private etagCache = new Map<string, { etag: string; data: any }>();
+    // Signed session token from login/signup, sent as a Bearer header
+    private token: string | null = null;
 
     constructor() {
         this.baseURL = API_BASE_URL;
     }
 
+    setToken(token: string | null) {
+        this.token = token;
+        this.etagCache.clear();
+    }
+
     private async request(endpoint: string, options: RequestInit = {}) {
         const url = `${this.baseURL}${endpoint}`;
+        const isGet = (options.method || 'GET').toUpperCase() === 'GET';
+        const cached = isGet ? this.etagCache.get(url) : undefined;
 
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
@@ -17,6 +28,8 @@ class APIService {
             ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...(cached ? { 'If-None-Match': cached.etag } : {}),
+                ...(this.token ? { Authorization: `Bearer ${this.token}` } : {}),
                 ...options.headers,
             },
             signal: controller.signal
@@ -26,12 +39,21 @@ class APIService {
             const response = await fetch(url, config);
             clearTimeout(timeoutId);
 
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
+
             const data = await response.json();
 
             if (!response.ok) {
                 throw new Error(data.error || 'API request failed');
             }
 
+            const etag = response.headers.get('ETag');
+            if (isGet && etag) {
+                this.etagCache.set(url, { etag, data });
+            }
+
             return data;
         } catch (error: any) {
             clearTimeout(timeoutId);
@@ -87,15 +109,23 @@ class APIService {
     }
 
     // Orders
-    async createOrder(orderData: any) {
+    // Retries must reuse the same idempotencyKey so the server places the order only once
+    async createOrder(orderData: any, idempotencyKey?: string) {
         return this.request(API_ENDPOINTS.CREATE_ORDER, {
             method: 'POST',
             body: JSON.stringify(orderData),
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined,
         });
     }
 
-    async getUserOrders(userId: number) {
-        return this.request(API_ENDPOINTS.GET_USER_ORDERS(userId));
+    async getPickupSlots(date?: string) {
+        return this.request(API_ENDPOINTS.GET_PICKUP_SLOTS(date));
+    }
+
+    // Pages are newest first; pass the previous response's nextCursor to load older orders
+    async getUserOrders(userId: number, cursor?: string | null) {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        return this.request(`${API_ENDPOINTS.GET_USER_ORDERS(userId)}${query}`);
     }
 
     // Loyalty
@@ -3,6 +3,7 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 export const KEYS = {
     USER_PROFILE: 'user_profile',
     AUTH_STATE: 'auth_state',
+    AUTH_TOKEN: 'auth_token',
     SAVED_UPI: 'saved_upi',
     LOYALTY_POINTS: 'loyalty_points',
     ORDERS: 'user_orders',